@@ -28,15 +28,22 @@ example usage of executable: python3 approx.py -inst ../data/small1.in -alg Appr
 import argparse
 import random
 import time
-import os
+from bounds import global_lower_bound
+from resultstore import STORE_PATH, configure, save_run
+from coverage import BACKENDS, greedy_cover, make_backend
 
-def approx_msc(U, S):
+def approx_msc(U, S, backend=None):
     '''
     input: U = {x_1, x_2, ..., x_n}: set of n elements
            S = {S_1, S_2, ..., S_m} where S_i is a subset of U: list of sets
+           backend: optional coverage backend (coverage.py) doing the set operations
     output: C is a subset of S such that C covers all elements in U: list of sets
             indices: list of indices of the sets in C
     '''
+    if backend is not None:
+        pruned_indices = greedy_cover(backend, prune=True)
+        return [S[idx] for idx in pruned_indices], pruned_indices
+
     selected = []         # list to store the selected sets and their indices
     S_indices = list(range(len(S)))  # list of indices of the sets in S
     uncovered = set(U)    # all elements in U are initially uncovered
@@ -85,24 +92,6 @@ def parse_instance(filepath):
     U = set(range(1, n + 1))                  # Create the set U with elements from 1 to n
     return U, S
 
-def write_output(instance, method, cutoff, solution):
-    '''
-    input: instance: path to the file containing the dataset
-           method: name of the method used to solve the instance
-           cutoff: time limit for the algorithm
-           solution: list of indices in the solution
-    output: None
-    '''
-    instance_name = instance.split('/')[-1]               # Extract the base name of the instance file (e.g., test1.in)
-    instance_name = os.path.splitext(instance_name)[0]    # Remove the file extension (e.g., test1)
-    output_dir = "../output"                              # Define the output directory and file name
-    base_name = f"{instance_name}_{method}_{cutoff}"
-    output_path = f"{output_dir}/{base_name}.sol"
-
-    with open(output_path, 'w') as f:                     # Write the output to the specified file
-        f.write(f"{len(solution)}\n")
-        f.write(" ".join(map(str, solution)) + "\n")
-
 def main():
     '''
     input: None
@@ -112,21 +101,16 @@ def main():
     parser.add_argument('-inst', required=True)
     parser.add_argument('-alg', choices=['Approx'], required=True)
     parser.add_argument('-time', type=int, required=True)
+    parser.add_argument('-backend', choices=BACKENDS, default='set')
+    parser.add_argument('-store', default=STORE_PATH)
+    parser.add_argument('-legacy', action='store_true')
     args = parser.parse_args()
+    configure(store=args.store, legacy=args.legacy)
 
-    U, S = parse_instance(args.inst)              # Parse the instance file to get U and S
     if args.alg == 'Approx':                      # Check if the algorithm is Approx
-        start_time = time.time()                  # Run the approximation algorithm
-        _, indices = approx_msc(U, S)             # Get the solution and its indices
-        elapsed_time = time.time() - start_time   # Calculate the elapsed time
-        if elapsed_time > args.time:
-            print(f"Algorithm timed out after {args.time} seconds")
-            return
-        write_output(args.inst, args.alg, args.time, indices)
+        run(args.inst, args.time, backend=args.backend)
 
-'''
-uncomment to run the main script
-def run(instance_path, cutoff=None, seed=None):
+def run(instance_path, cutoff=None, seed=None, backend="set"):
     '''
     wrapper to run the approximation algorithm (for use with exec script)
 
@@ -134,17 +118,22 @@ def run(instance_path, cutoff=None, seed=None):
         instance_path (str): path to input .in file in data folder
         cutoff (int): cutoff time in seconds (not used here, but included for compatibility)
         seed (int): random seed (not used in this deterministic algorithm)
+        backend (str): coverage backend, 'set' or 'bitset' (coverage.py)
     '''
     U, S = parse_instance(instance_path)
     start_time = time.time()
-    _, indices = approx_msc(U, S)
+    cover = make_backend(backend, U, S)   # building the bitsets is part of the run
+    _, indices = approx_msc(U, S, cover)
     elapsed_time = time.time() - start_time
 
     if cutoff is not None and elapsed_time > cutoff:
         print(f"Approximation algorithm exceeded cutoff time of {cutoff} seconds.")
         return
 
-    write_output(instance_path, "Approx", cutoff if cutoff else 0, indices)
-'''
+    solution = [i + 1 for i in indices]                                   # approx_msc indices are 0-indexed
+    bound, source = global_lower_bound(U, S, len(indices), instance_path)  # record how far the greedy cover is from optimal
+    save_run(instance_path, "Approx", cutoff if cutoff else 0, None, solution, [(elapsed_time, len(solution))],
+             elapsed_time, bound, source)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,265 @@
+"""
+Micro-benchmarks for the solver hot kernels, with regression gates.
+
+Kernels timed on every benchmark instance:
+- approx_msc (approx.py): greedy cover with pruning
+- prune_solution (simulatedannealing.py): pruning the unpruned greedy cover
+- lower_bound_lp (bnb.py): root lower bound of BnB
+- is_solution_feasible (hillclimbing.py): coverage check of the greedy cover
+- get_coverage (simulatedannealing.py): union of the greedy cover
+- sa_iteration: one iteration of simulated_annealing (averaged over SA_ITERATIONS iterations)
+- hc_iteration: one iteration of hill_climbing from the greedy cover
+Every kernel also runs on the bitset coverage backend (coverage.py) as <kernel>_bitset, with the bitsets
+built once per instance outside the timed calls (get_coverage_bitset times the bitset union of the cover,
+lower_bound_lp_bitset the bound of bnb.lower_bound_backend).
+
+Benchmark instances are a few files from data/ plus uniform instances of increasing size made with
+generate.py (fixed seed, written to a temporary directory). The iteration kernels only run on the
+instances in ITERATION_INSTANCES, since a single iteration takes seconds on the largest ones.
+
+Each measurement runs the kernel WARMUP times, picks a loop count so one sample takes at least
+MIN_SAMPLE_TIME seconds (the calibration run counts as the first sample), then takes -repeat samples
+and reports min / median / mean / stdev per call.
+The min is compared against benchmark_baseline.json: a kernel slower than baseline * (1 + allowance)
+is a regression, and the exit code is 1. Regressed kernels are re-measured once, with RETRY_FACTOR times
+as many samples, and the better min of both passes is kept before failing (the machine speed drifts, so
+more samples make it more likely that the min comes from an undisturbed stretch, like the baseline did).
+The allowance of a kernel is the larger of -tolerance and NOISE_SIGMAS baseline stdevs (relative to the
+baseline min), so kernels that were noisy when the baseline was recorded get more room. Kernels faster
+than GATE_MIN_TIME per call are reported but not gated: at that scale the timings are mostly noise.
+Baselines are machine specific; refresh them with -update on the machine that runs the gate.
+
+Example Usage:
+    python3 benchmark.py                       # compare against the stored baseline
+    python3 benchmark.py -update               # store the current numbers as the new baseline
+    python3 benchmark.py -kernels approx_msc get_coverage -tolerance 0.5
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import approx
+import bnb
+import coverage
+import generate
+import hillclimbing
+import simulatedannealing
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DATA_INSTANCES = ["small1", "large12", "large10"]  # files from data/ used as benchmark instances
+GENERATED_SIZES = [1000, 4000]                     # n = m of the generated uniform instances
+ITERATION_KERNELS = ["sa_iteration", "hc_iteration", "sa_iteration_bitset", "hc_iteration_bitset"]
+ITERATION_INSTANCES = ["small1", "large12", "uniform1000"]   # the iteration kernels take seconds on larger ones
+GENERATED_SEED = 6140
+WARMUP = 1
+REPEAT = 5
+MIN_SAMPLE_TIME = 0.2      # seconds, lower bound on the duration of one sample
+SA_ITERATIONS = 5          # iterations per sa_iteration call
+TOLERANCE = 0.25           # allowed slowdown relative to the baseline
+NOISE_SIGMAS = 3           # the allowance of a kernel is at least this many baseline stdevs
+GATE_MIN_TIME = 1e-5       # seconds per call, faster kernels are not gated
+RETRY_FACTOR = 3           # the re-measurement of regressed kernels takes this many times -repeat samples
+
+
+def load_instances(data_dir, work_dir):
+    """
+    input:  data_dir: directory holding the data/*.in files
+            work_dir: directory to write the generated instances to
+
+    output: list of (name, path) of the benchmark instances
+    """
+    instances = [(name, os.path.join(data_dir, f"{name}.in")) for name in DATA_INSTANCES]
+    for size in GENERATED_SIZES:
+        out = os.path.join(work_dir, f"uniform{size}")
+        generate.generate("uniform", size, size, out, seed=GENERATED_SEED)
+        instances.append((f"uniform{size}", f"{out}.in"))
+    return instances
+
+
+def make_kernels(path):
+    """
+    input:  path: path to an .in file
+
+    output: dictionary mapping kernel names to zero-argument callables running that kernel on the instance
+    """
+    U, S = approx.parse_instance(path)
+    raw_indices = list(range(1, len(S) + 1))
+    subset_indices = {frozenset(s): i for i, s in enumerate(S, 1)}
+    greedy, _ = simulatedannealing.greedy_approx(U, S, raw_indices)   # unpruned greedy cover (indices)
+    pruned = simulatedannealing.prune_solution(greedy, S, U)
+    pruned_sets = [S[i] for i in pruned]
+    bits = coverage.make_backend("bitset", U, S)
+
+    def sa_iteration(backend=None):
+        # simulated_annealing prints its progress every 100 iterations
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulatedannealing.simulated_annealing(U, S, raw_indices, float("inf"), seed=1,
+                                                   initial_solution=pruned, max_iterations=SA_ITERATIONS,
+                                                   backend=backend)
+
+    return {
+        "approx_msc": lambda: approx.approx_msc(U, S),
+        "prune_solution": lambda: simulatedannealing.prune_solution(greedy, S, U),
+        "lower_bound_lp": lambda: bnb.lower_bound_lp(set(), S, U),
+        "is_solution_feasible": lambda: hillclimbing.is_solution_feasible(pruned_sets, U),
+        "get_coverage": lambda: simulatedannealing.get_coverage(pruned, S),
+        "sa_iteration": sa_iteration,
+        "hc_iteration": lambda: hillclimbing.hill_climbing(U, S, subset_indices, initial_solution=pruned_sets,
+                                                           max_iterations=1, seed=1),
+        "approx_msc_bitset": lambda: approx.approx_msc(U, S, bits),
+        "prune_solution_bitset": lambda: simulatedannealing.prune_solution(greedy, S, U, bits),
+        "lower_bound_lp_bitset": lambda: bnb.lower_bound_backend(bits.empty(), 0, bits),
+        "is_solution_feasible_bitset": lambda: hillclimbing.is_solution_feasible(pruned_sets, U, bits),
+        "get_coverage_bitset": lambda: bits.union(pruned),
+        "sa_iteration_bitset": lambda: sa_iteration(bits),
+        "hc_iteration_bitset": lambda: hillclimbing.hill_climbing(U, S, subset_indices, initial_solution=pruned_sets,
+                                                                  max_iterations=1, seed=1, backend=bits),
+    }
+
+
+def measure(fn, repeat=REPEAT, warmup=WARMUP, per_call=1):
+    """
+    input:  fn: zero-argument callable
+            repeat: number of samples
+            warmup: number of untimed calls before sampling
+            per_call: number of kernel iterations done by one call of fn
+
+    output: dictionary with min / median / mean / stdev seconds per kernel iteration and the loop count
+    """
+    for _ in range(warmup):
+        fn()
+    # like timeit, keep the garbage collector from adding noise to the samples
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_TIME or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [elapsed / (loops * per_call)]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / (loops * per_call))
+    if gc_was_enabled:
+        gc.enable()
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+    }
+
+
+def run_benchmarks(data_dir, kernels=None, repeat=REPEAT, keys=None):
+    """
+    input:  data_dir: directory holding the data/*.in files
+            kernels: names of the kernels to run (None = all)
+            repeat: number of samples per measurement
+            keys: only run these "<kernel>@<instance>" measurements (None = all)
+
+    output: dictionary mapping "<kernel>@<instance>" to the measurement of that kernel on that instance
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, path in load_instances(data_dir, work_dir):
+            if keys is not None and not any(key.endswith(f"@{name}") for key in keys):
+                continue
+            for kernel, fn in make_kernels(path).items():
+                if kernels and kernel not in kernels:
+                    continue
+                if kernel in ITERATION_KERNELS and name not in ITERATION_INSTANCES:
+                    continue
+                if keys is not None and f"{kernel}@{name}" not in keys:
+                    continue
+                per_call = SA_ITERATIONS if kernel.startswith("sa_iteration") else 1
+                results[f"{kernel}@{name}"] = measure(fn, repeat, per_call=per_call)
+                print(f"{kernel:>28} @ {name:<12} min {results[f'{kernel}@{name}']['min'] * 1e3:10.4f} ms")
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    input:  results: output of run_benchmarks
+            baseline: stored baseline (same layout as results)
+            tolerance: allowed relative slowdown of the min time (raised per kernel to NOISE_SIGMAS
+                       baseline stdevs)
+
+    output: list of (key, baseline min, current min) for every regressed kernel
+    """
+    regressions = []
+    for key, current in results.items():
+        if key not in baseline:
+            print(f"{key}: no baseline")
+            continue
+        ratio = current["min"] / baseline[key]["min"]
+        if baseline[key]["min"] < GATE_MIN_TIME:
+            print(f"{key:>40}: {ratio:6.2f}x baseline (not gated)")
+            continue
+        allowance = max(tolerance, NOISE_SIGMAS * baseline[key]["stdev"] / baseline[key]["min"])
+        print(f"{key:>40}: {ratio:6.2f}x baseline (allowed {1 + allowance:.2f}x)")
+        if ratio > 1 + allowance:
+            regressions.append((key, baseline[key]["min"], current["min"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the set cover kernels")
+    parser.add_argument('-data', default='../data', help='Directory holding the data/*.in files')
+    parser.add_argument('-kernels', nargs='+', required=False, help='Only run these kernels')
+    parser.add_argument('-repeat', type=int, default=REPEAT, help='Number of samples per measurement')
+    parser.add_argument('-tolerance', type=float, default=TOLERANCE, help='Allowed slowdown (0.25 = 25%%)')
+    parser.add_argument('-baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('-update', action='store_true', help='Store the results as the new baseline')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.data, args.kernels, args.repeat)
+
+    if args.update:
+        baseline = {"machine": {"python": platform.python_version(), "platform": platform.platform()},
+                    "results": {}}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        baseline["results"].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}, run with -update first")
+        sys.exit(1)
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        # Re-measure the regressed kernels once, so a burst of machine noise does not fail the gate
+        print("Re-measuring regressed kernels")
+        retry = run_benchmarks(args.data, args.kernels, args.repeat * RETRY_FACTOR,
+                               keys={key for key, _, _ in regressions})
+        for key, current in retry.items():
+            current["min"] = min(current["min"], results[key]["min"])
+        regressions = compare(retry, baseline["results"], args.tolerance)
+    for key, before, after in regressions:
+        print(f"REGRESSION {key}: {before * 1e3:.4f} ms -> {after * 1e3:.4f} ms")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -11,10 +11,28 @@ Algorithm Overview:
 Branch and Bound systematically explores the solution space using depth-first search (DFS), 
 while pruning branches that cannot yield better solutions than the current best. 
 
+Search strategies (selected with -strategy):
+- dfs: branch on the next subset in input order (include / exclude), depth-first.
+- mce: branch on the uncovered element with the fewest candidate subsets, depth-first,
+  trying the candidates in greedy order (most uncovered elements first).
+- bestfirst: mce branching, always expanding the node with the smallest lower bound. The priority
+  queue is capped at -max_frontier nodes, after which the search continues depth-first.
+- lds: limited discrepancy search over mce branching, trusting the greedy order with 0, 1, 2, ...
+  allowed deviations until the search space is exhausted.
+
 - Initial upper bound: We compute a greedy approximate solution (O(log n) approximation) to set the initial upper bound.
-- Lower bound estimation: For pruning, we estimate the minimum number of additional subsets needed to cover the remaining elements using a greedy heuristic.
+- Lower bound estimation: For pruning, every strategy uses the LP dual bound sum_e 1 / (largest number of
+  uncovered elements covered by an available subset containing e), which is a valid lower bound, so an
+  exhaustive search proves optimality.
 - Pruning: Any branch with lower bound ≥ current best is discarded.
-- Recursion continues until all possible branches are explored or the cutoff time is reached.
+- Early termination: the search stops as soon as the best solution meets the global lower bound of the
+  instance (see bounds.py), since it is then provably optimal.
+- The search continues until all possible branches are explored or the cutoff time is reached.
+- Checkpointing: the incumbent and the explicit DFS frontier are saved periodically, so a killed
+  run can be continued with -resume using the remaining time budget.
+- Coverage backend (-backend bitset, see coverage.py): the greedy upper bound and the dfs search keep
+  the covered elements as a packed bitset, and the lower bound of a dfs node scores all the available
+  subsets against the uncovered mask at once instead of scanning them one by one.
 
 This method guarantees an exact solution but is exponential in the worst case.
 To manage runtime, the search is bounded by a time limit.
@@ -26,130 +44,330 @@ Inputs:
 
 --------------------------------------------------------------
 Outputs:
-- .sol file containing the size and indices of the selected subsets
-- .trace file logging (time, cost) whenever a better solution is found
+- A run in the result store (resultstore.py) with the indices of the selected subsets, the trace
+  of (time, cost) whenever a better solution is found, the global lower bound, and the node count
+  (exported to the legacy .sol/.trace/.cert files when asked)
+- .ckpt checkpoint file while the run is in progress (removed once the run finishes)
 
 --------------------------------------------------------------
 Example Usage:
     python3 bnb.py -inst ../data/small1.in -alg BnB -time 600
+    python3 bnb.py -inst ../data/small1.in -alg BnB -time 600 -strategy bestfirst
+    python3 bnb.py -inst ../data/large1.in -alg BnB -time 600 -backend bitset
 
 Assumptions:
 - The input parser and approximation algorithm (used for initial bound) are in approx.py
 - Subsets are represented as sets of elements (e.g., set([1, 2, 3]))
-- The approx_msc, parse_instance and write_output functions are available from approx.py
+- The approx_msc and parse_instance functions are available from approx.py
 """
 
-import time, os, math
-from approx import approx_msc, parse_instance, write_output
+import argparse, time, math, heapq, itertools
+from approx import approx_msc, parse_instance
+from bounds import EPS, element_frequencies, global_lower_bound
+from resultstore import STORE_PATH, configure, save_run
+from checkpoint import CHECKPOINT_INTERVAL, checkpoint_path, save_checkpoint, load_checkpoint, remove_checkpoint
+from coverage import BACKENDS, make_backend
+
+STRATEGIES = ["dfs", "mce", "bestfirst", "lds"]
+MAX_FRONTIER = 200000   # default memory cap (number of nodes) of the bestfirst priority queue
 
 def lower_bound_lp(covered, subsets, universe):
     """
-    A better lower bound heuristic using an LP relaxation idea.
-    For each uncovered element e in (universe - covered), let f(e) be the number
-    of available subsets (in 'subsets') that cover e. Then the lower bound is the ceiling
-    of the sum over e of 1/f(e).
+    LP dual lower bound on the number of subsets (from 'subsets') still needed to cover universe - covered.
+    For each uncovered element e, let g(e) be the largest number of uncovered elements covered by one
+    available subset containing e. u_e = 1/g(e) is dual feasible (every subset gets a total of at most 1),
+    so the ceiling of the sum over e of 1/g(e) is a valid lower bound. (The sum of 1/f(e), with f(e) the
+    number of subsets covering e, is not: it can exceed the optimum.)
     """
     remaining = universe - covered
     if not remaining:
         return 0
-    total = 0.0
-    for e in remaining:
-        f_e = sum(1 for s in subsets if e in s)
-        if f_e == 0:
-            return float("inf")  # If an element is uncovered by any available subset
-        total += 1 / f_e
-    return math.ceil(total)
+    largest = dict.fromkeys(remaining, 0)   # g(e) for every uncovered element
+    for s in subsets:
+        common = remaining & s
+        gain = len(common)
+        for e in common:
+            if gain > largest[e]:
+                largest[e] = gain
+    if not all(largest.values()):
+        return float("inf")  # If an element is uncovered by any available subset
+    return math.ceil(sum(1 / g for g in largest.values()) - EPS)
+
+def lower_bound_backend(covered, idx, backend):
+    """
+    lower_bound_lp for the dfs node (covered, idx) on the coverage backend: the available subsets are
+    idx, idx + 1, ... and the uncovered elements are those not in the covered mask.
+    """
+    return backend.dual_bound(covered, idx)
 
-def log_trace(trace_path, timestamp, cost):
+def uncovered_candidates(covered, excluded, universe, containing):
     """
-    input:  trace_path: path to the .trace file to write to
-            timestamp: current elapsed time (in seconds)
-            cost: size of the current best solution
+    input:  covered: set of elements covered by the selected subsets
+            excluded: frozenset of subset indices that may no longer be selected
+            universe: set of all elements
+            containing: dictionary mapping each element to the indices of the subsets containing it
 
-    output: None
+    output: dictionary mapping every uncovered element to the indices of the subsets that can still cover it
+    """
+    return {e: [i for i in containing[e] if i not in excluded] for e in universe - covered}
+
+def lower_bound_candidates(candidates, subsets):
+    """
+    input:  candidates: output of uncovered_candidates for the node
+            subsets: list of all subsets
+
+    output: lower bound on the number of subsets still needed to cover the uncovered elements
+
+    LP dual bound of the remaining problem: u_e = 1 / (the most uncovered elements any candidate of e
+    covers) is dual feasible (every candidate subset gets a total of at most 1), so the ceiling of
+    sum_e u_e is a valid lower bound (the same starting point as bounds.lagrangian_bound).
+    """
+    if not all(candidates.values()):
+        return float("inf")  # If an element is uncovered by any available subset
+    uncovered = set(candidates)
+    # number of uncovered elements covered by each candidate subset
+    gain = {i: len(uncovered & subsets[i]) for i in set(itertools.chain.from_iterable(candidates.values()))}
+    total = sum(1 / max(map(gain.__getitem__, sets)) for sets in candidates.values())
+    return math.ceil(total - EPS)
+
+def child_candidates(node, candidates, child, subsets):
+    """
+    input:  node: parent node
+            candidates: output of uncovered_candidates for the parent node
+            child: child node produced by branch_on_element
+            subsets: list of all subsets
 
-    This function appends a line to the trace file recording the time at which a new best solution
-    was found, along with the size of that solution. Used for tracking progress during execution.
+    output: uncovered_candidates of the child, filtered from the parent's candidate lists
+            (lists without newly excluded subsets are shared with the parent, they are never modified)
     """
-    with open(trace_path, "a") as f:
-        f.write(f"{timestamp:.2f} {cost}\n")
+    chosen = subsets[child[0][-1]]
+    newly_excluded = child[2] - node[2]
+    return {e: sets if newly_excluded.isdisjoint(sets) else [i for i in sets if i not in newly_excluded]
+            for e, sets in candidates.items() if e not in chosen}
 
-def run_bnb(filepath, cutoff):
+def branch_on_element(node, candidates, subsets):
+    """
+    input:  node: (selected, covered, excluded, discrepancies)
+            candidates: output of uncovered_candidates for the node
+
+    output: list of child nodes, from the most to the least promising
+
+    Branches on the uncovered element with the fewest candidate subsets (the most constrained one).
+    Child j selects the j-th candidate and excludes the candidates before it, so the children
+    partition the search space. Candidates are ordered greedily by the number of uncovered
+    elements they cover; child j takes j discrepancies from that greedy choice.
+    """
+    selected, covered, excluded, discrepancies = node
+    element = min(candidates, key=lambda e: len(candidates[e]))
+    uncovered = candidates.keys()
+    options = sorted(candidates[element], key=lambda i: -len(uncovered & subsets[i]))
+    return [(selected + [i], covered | subsets[i], excluded | frozenset(options[:j]), discrepancies + j)
+            for j, i in enumerate(options)]
+
+def run_bnb(filepath, cutoff, resume=False, checkpoint_interval=CHECKPOINT_INTERVAL, strategy="dfs",
+            max_frontier=MAX_FRONTIER, backend="set"):
     """
     input:  filepath: path to the file containing the instance
             cutoff: time limit (in seconds) for the algorithm
-
-    output: None (writes output to .sol and .trace files)
+            resume: continue from the last checkpoint of this run, if there is one
+            checkpoint_interval: number of seconds between two checkpoints
+            strategy: search strategy, one of STRATEGIES
+                - dfs: depth-first, branching on the next subset in input order
+                - mce: depth-first, branching on the uncovered element with the fewest candidate subsets
+                - bestfirst: mce branching, expanding the node with the smallest lower bound first;
+                  falls back to depth-first once the frontier holds max_frontier nodes
+                - lds: limited discrepancy search over mce branching, guided by the greedy choice;
+                  runs with 0, 1, 2, ... allowed discrepancies until a run is not cut by the limit
+            max_frontier: memory cap (number of nodes) for the bestfirst priority queue
+            backend: coverage backend (coverage.py) of the greedy upper bound and of the dfs search;
+                     the element-branching strategies keep their candidate lists on sets
+
+    output: dictionary with the best cost, the number of nodes expanded and the time to the best solution
+            (also records the run in the result store)
 
     This function runs a branch and bound algorithm to solve the Minimum Set Cover problem.
-    It initializes an upper bound using a greedy approximation, then recursively explores the solution space
-    using depth-first search. Subtrees are pruned if their lower bound exceeds the best solution found so far.
-    A trace file logs each time a better solution is discovered.
+    It initializes an upper bound using a greedy approximation, then explores the solution space
+    with the selected strategy. Subtrees are pruned if their lower bound exceeds the best solution found so far.
+    The trace records each time a better solution is discovered.
+
+    The search keeps its frontier on an explicit stack (or heap) instead of the call stack, so that the
+    incumbent and the frontier can be checkpointed every checkpoint_interval seconds and a
+    killed run can be resumed with the remaining time budget.
     """
-    instance_name = os.path.splitext(os.path.basename(filepath))[0]
-    trace_path = os.path.join("..", "output", f"{instance_name}_BnB_{cutoff}.trace")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown BnB strategy: {strategy}")
+    ckpt_path = checkpoint_path(filepath, "BnB", cutoff)
 
-    start_time = time.time()
     universe, subsets = parse_instance(filepath)
     num_sets = len(subsets)
+    containing = element_frequencies(universe, subsets)
+    cover = make_backend(backend, universe, subsets)
+
+    # Each frontier node is
+    #   dfs:    (selected, covered, idx)
+    #   others: (selected, covered, excluded, discrepancies)
+    # where
+    #   selected: list of indices representing the subsets selected so far
+    #   covered: set of elements currently covered by selected subsets (a backend mask for dfs with a backend)
+    #   idx: current index in the subset list to consider
+    #   excluded: frozenset of subset indices ruled out by earlier branches
+    #   discrepancies: number of times the path deviated from the greedy choice (used by lds)
+    # bestfirst keeps compact (lower bound, insertion counter, selected, excluded, discrepancies) entries on
+    # a heap: the bound is computed when a node is pushed, while its covered elements and candidate lists
+    # (tens of KB per node on the large instances) are rebuilt from 'selected' and 'excluded' when it is
+    # popped. A node whose covered elements are None is such a compact node (also on the depth-first
+    # stack after the memory cap is reached).
+    root = ([], set(), 0) if strategy == "dfs" else ([], set(), frozenset(), 0)
+    bitset_dfs = cover is not None and strategy == "dfs"
+    if bitset_dfs:
+        root = ([], cover.empty(), 0)
+
+    state = load_checkpoint(ckpt_path) if resume else None
+    if state is not None and state.get("strategy", "dfs") != strategy:
+        print(f"Checkpoint was written by strategy {state.get('strategy', 'dfs')}, starting a new search")
+        state = None
+    if state is not None and state.get("backend", "set") != backend:
+        print(f"Checkpoint was written with backend {state.get('backend', 'set')}, starting a new search")
+        state = None
+    if state is not None:
+        # Shift the start time back by the time already spent, so that both the trace
+        # timestamps and the cutoff continue from where the previous run stopped.
+        start_time = time.time() - state["elapsed"]
+        best = state["best"]
+        frontier = state["frontier"]
+        search = state["search"]
+        print(f"Resuming BnB from checkpoint at {state['elapsed']:.2f}s "
+              f"(best={best['cost']}, frontier={len(frontier)})")
+    else:
+        start_time = time.time()
+
+        # Use the greedy approximation to initialize the best solution.
+        _, greedy_indices = approx_msc(universe, subsets, cover)
+
+        # Use a dictionary to store the current best solution, its cost and the (time, cost) trace.
+        best = {
+            "solution": list(greedy_indices),
+            "cost": len(greedy_indices),
+            "time": time.time() - start_time
+        }
+        best["trace"] = [(best["time"], best["cost"])]
+
+        frontier = [(0, 0, [], frozenset(), 0)] if strategy == "bestfirst" else [root]
+        # Search bookkeeping:
+        #   nodes: number of nodes expanded so far
+        #   heap: whether the frontier is still a priority queue (bestfirst before the memory cap)
+        #   limit, truncated: discrepancy limit of the current lds pass, and whether it cut any branch
+        #   pushed: insertion counter used to break ties on the heap
+        search = {"nodes": 0, "heap": strategy == "bestfirst", "limit": 0, "truncated": False, "pushed": 1}
+
+    # Global lower bound: once the incumbent reaches it, the incumbent is optimal and the search can stop.
+    global_bound, bound_source = global_lower_bound(universe, subsets, best["cost"], filepath)
+    last_checkpoint = time.time()
+
+    def snapshot():
+        return {"elapsed": time.time() - start_time, "best": best, "frontier": frontier,
+                "search": search, "strategy": strategy, "backend": backend}
+
+    #   - Each node is either a complete cover, pruned with its lower bound, or expanded into children.
+    #   - Updates the best known solution if a complete and better one is found.
+    #   - Applies pruning using a lower bound heuristic to avoid unnecessary exploration.
+    #   - Terminates early if time limit (cutoff) is exceeded.
+    while best["cost"] > global_bound:
+        if not frontier:
+            if strategy == "lds" and search["truncated"]:
+                # The last pass was cut by the discrepancy limit: allow one more discrepancy.
+                search["limit"] += 1
+                search["truncated"] = False
+                frontier.append(root)
+                continue
+            break
 
-    # Use the greedy approximation to initialize the best solution.
-    _, greedy_indices = approx_msc(universe, subsets)
-    
-    # Use a dictionary to store the current best solution and its cost.
-    best = {
-        "solution": list(greedy_indices),
-        "cost": len(greedy_indices)
-    }
-    log_trace(trace_path, time.time() - start_time, best["cost"])
-
-    # Define the DFS function that updates 'best' in place.
-    def dfs(selected, covered, idx):
-        """
-        Recursive Depth-First Search (DFS) function for exploring subset selections in Branch and Bound.
-
-        input:
-            selected: list of indices representing the subsets selected so far
-            covered: set of elements currently covered by selected subsets
-            idx: current index in the subset list to consider
-
-        behavior:
-            - Recursively explores the inclusion or exclusion of each subset.
-            - Updates the best known solution if a complete and better one is found.
-            - Applies pruning using a lower bound heuristic to avoid unnecessary exploration.
-            - Terminates early if time limit (cutoff) is exceeded.
-
-        output: 
-            None. Updates the shared 'best' dictionary and logs progress to the trace file.
-        """
         elapsed = time.time() - start_time
         if elapsed > cutoff:
-            return
-
-        if covered == universe:
+            break
+
+        if time.time() - last_checkpoint >= checkpoint_interval:
+            save_checkpoint(ckpt_path, snapshot())
+            last_checkpoint = time.time()
+
+        if search["heap"]:
+            node_bound, _, selected, excluded, discrepancies = heapq.heappop(frontier)
+            node = (selected, None, excluded, discrepancies)
+        else:
+            node, node_bound = frontier.pop(), None
+        if node[1] is None:
+            node = (node[0], set().union(*(subsets[i] for i in node[0])), node[2], node[3])
+        search["nodes"] += 1
+        selected, covered = node[0], node[1]
+
+        if (cover.is_full(covered) if bitset_dfs else covered == universe):
             if len(selected) < best["cost"]:
                 best["solution"] = list(selected)
                 best["cost"] = len(selected)
-                log_trace(trace_path, elapsed, best["cost"])
-            return
-
-        if idx >= num_sets:
-            return
-
-        lower_bound = len(selected) + lower_bound_lp(covered, subsets[idx:], universe)
-        if lower_bound >= best["cost"]:
-            return
-
-        # Include current subset: add the index and union the subset elements.
-        dfs(selected + [idx], covered | subsets[idx], idx + 1)
-        # Exclude current subset: keep current state and continue.
-        dfs(selected, covered, idx + 1)
-
-    dfs([], set(), 0)
-
-    # Write the output using write_output (best solution is stored as indices)
+                best["time"] = elapsed
+                best["trace"].append((elapsed, best["cost"]))
+            continue
+
+        if strategy == "dfs":
+            idx = node[2]
+            if idx >= num_sets:
+                continue
+
+            if bitset_dfs:
+                lower_bound = len(selected) + lower_bound_backend(covered, idx, cover)
+            else:
+                lower_bound = len(selected) + lower_bound_lp(covered, subsets[idx:], universe)
+            if lower_bound >= best["cost"]:
+                continue
+
+            # Push the exclude branch first so that the include branch is explored first.
+            # Exclude current subset: keep current state and continue.
+            frontier.append((selected, covered, idx + 1))
+            # Include current subset: add the index and union the subset elements.
+            included = cover.add(covered, idx) if bitset_dfs else covered | subsets[idx]
+            frontier.append((selected + [idx], included, idx + 1))
+            continue
+
+        candidates = uncovered_candidates(covered, node[2], universe, containing)
+        if node_bound is None:
+            node_bound = len(selected) + lower_bound_candidates(candidates, subsets)
+        if node_bound >= best["cost"]:
+            continue
+
+        children = branch_on_element(node, candidates, subsets)
+        if strategy == "lds":
+            allowed = [child for child in children if child[3] <= search["limit"]]
+            if len(allowed) < len(children):
+                search["truncated"] = True
+            children = allowed
+
+        if search["heap"]:
+            for child in children:
+                candidates_of_child = child_candidates(node, candidates, child, subsets)
+                child_bound = len(child[0]) + lower_bound_candidates(candidates_of_child, subsets)
+                if child_bound < best["cost"]:
+                    heapq.heappush(frontier, (child_bound, search["pushed"], child[0], child[2], child[3]))
+                    search["pushed"] += 1
+            if len(frontier) > max_frontier:
+                # Memory cap reached: continue depth-first, expanding the best nodes first.
+                print(f"BnB frontier reached {len(frontier)} nodes, falling back to depth-first search")
+                frontier = [(entry[2], None, entry[3], entry[4])
+                            for entry in sorted(frontier, key=lambda entry: entry[:2], reverse=True)]
+                search["heap"] = False
+        else:
+            # Push in reverse so that the most promising child is explored first.
+            frontier.extend(reversed(children))
+
+    # The run finished normally (search exhausted or cutoff reached), the checkpoint is no longer needed.
+    remove_checkpoint(ckpt_path)
+
+    # Record the run (best solution is stored as 0-indexed indices)
     one_indexed_solution = [i + 1 for i in best["solution"]]
-    write_output(filepath, "BnB", cutoff, one_indexed_solution)
+    save_run(filepath, "BnB", cutoff, None, one_indexed_solution, best["trace"], time.time() - start_time,
+             global_bound, bound_source, {"strategy": strategy, "nodes": search["nodes"], "backend": backend})
+    print(f"BnB ({strategy}): best={best['cost']}, nodes={search['nodes']}, time_to_best={best['time']:.2f}s")
+    return {"cost": best["cost"], "nodes": search["nodes"], "time_to_best": best["time"],
+            "lower_bound": global_bound}
 
 def main():
     """
@@ -157,6 +375,13 @@ def main():
                 -inst <input_file_path>
                 -alg BnB
                 -time <cutoff_time_in_seconds>
+                -resume (optional, continue from the last checkpoint)
+                -ckpt_interval <seconds> (optional)
+                -strategy dfs|mce|bestfirst|lds (optional, default dfs)
+                -max_frontier <nodes> (optional, memory cap of bestfirst)
+                -backend set|bitset (optional, coverage backend, default set)
+                -store <path> (optional, result store the run is recorded in)
+                -legacy (optional, also write the legacy .sol/.trace files)
 
     output: None
 
@@ -167,12 +392,21 @@ def main():
     parser.add_argument('-inst', required=True)
     parser.add_argument('-alg', choices=['BnB'], required=True)
     parser.add_argument('-time', type=int, required=True)
+    parser.add_argument('-resume', action='store_true')
+    parser.add_argument('-ckpt_interval', type=int, default=CHECKPOINT_INTERVAL)
+    parser.add_argument('-strategy', choices=STRATEGIES, default='dfs')
+    parser.add_argument('-max_frontier', type=int, default=MAX_FRONTIER)
+    parser.add_argument('-backend', choices=BACKENDS, default='set')
+    parser.add_argument('-store', default=STORE_PATH)
+    parser.add_argument('-legacy', action='store_true')
     args = parser.parse_args()
+    configure(store=args.store, legacy=args.legacy)
 
     if args.alg == 'BnB':
-        run_bnb(args.inst, args.time)
+        run_bnb(args.inst, args.time, args.resume, args.ckpt_interval, args.strategy, args.max_frontier, args.backend)
 
-def run(instance_path, cutoff, seed=None):
+def run(instance_path, cutoff, seed=None, resume=False, checkpoint_interval=CHECKPOINT_INTERVAL, strategy="dfs",
+        max_frontier=MAX_FRONTIER, backend="set"):
     """
     Wrapper function to make Branch and Bound callable from main.py.
 
@@ -180,10 +414,15 @@ def run(instance_path, cutoff, seed=None):
         instance_path (str): Path to the input .in file from data folder
         cutoff (int): Time limit in seconds for the algorithm
         seed (int): Random seed (not used in BnB but accepted for consistency)
+        resume (bool): Continue from the last checkpoint of this run, if there is one
+        checkpoint_interval (int): Number of seconds between two checkpoints
+        strategy (str): Search strategy, one of STRATEGIES
+        max_frontier (int): Memory cap (number of nodes) of the bestfirst priority queue
+        backend (str): Coverage backend, 'set' or 'bitset' (coverage.py)
 
     This function prepares the parameters and invokes run_bnb.
     """
-    run_bnb(instance_path, cutoff)
+    return run_bnb(instance_path, cutoff, resume, checkpoint_interval, strategy, max_frontier, backend)
 
 if __name__ == "__main__":
     main()
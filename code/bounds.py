@@ -0,0 +1,144 @@
+"""
+Global lower bounds for the Minimum Set Cover problem.
+
+A lower bound L on the size of any cover is computed once per instance, before an algorithm starts.
+As soon as an algorithm holds a cover of size L, that cover is provably optimal and the algorithm can stop.
+The bound and the gap between the final cover and L are recorded with the run (see resultstore.py).
+
+Bounds used (the largest one wins):
+- Lagrangian relaxation: the covering constraints are moved into the objective with multipliers u >= 0,
+  and u is tuned by subgradient optimization. Every L(u) is a lower bound; it starts from an LP dual
+  feasible point, so it is never weaker than that LP dual bound.
+- Disjoint element packing: if no subset contains two elements of a set P, every cover needs |P| subsets.
+  P is grown greedily from the least frequent elements.
+- Known optimum: when the instance comes with a data/<instance>.out file, its value is the optimum.
+"""
+
+import math
+import os
+
+import numpy as np
+
+EPS = 1e-9                    # tolerance for rounding a fractional bound up
+LAGRANGIAN_ITERATIONS = 300   # maximum number of subgradient iterations
+
+
+def element_frequencies(U, S):
+    """
+    input:  U: set of elements
+            S: list of subsets
+
+    output: dictionary mapping every element of U to the list of indices of the subsets containing it
+    """
+    containing = {e: [] for e in U}
+    for i, s in enumerate(S):
+        for e in s:
+            if e in containing:
+                containing[e].append(i)
+    return containing
+
+
+def lagrangian_bound(U, S, upper_bound, max_iterations=LAGRANGIAN_ITERATIONS):
+    """
+    input:  U: set of elements
+            S: list of subsets
+            upper_bound: size of a known cover, used as the target of the subgradient steps
+            max_iterations: maximum number of subgradient iterations
+
+    output: ceiling of the best Lagrangian bound found (a lower bound on OPT)
+
+    Relaxing the covering constraints with multipliers u >= 0 gives, for every u,
+        L(u) = sum_e u_e + sum_i min(0, 1 - sum_{e in S_i} u_e) <= OPT
+    u starts from the dual feasible point u_e = 1 / (size of the largest subset containing e)
+    and is improved with subgradient optimization (step size halved when L stops improving).
+    """
+    elements = sorted(U)
+    position = {e: k for k, e in enumerate(elements)}
+    rows = np.fromiter((i for i, s in enumerate(S) for e in s if e in position), dtype=np.int64)
+    cols = np.fromiter((position[e] for s in S for e in s if e in position), dtype=np.int64)
+    n, m = len(elements), len(S)
+    if np.bincount(cols, minlength=n).min(initial=1) == 0:
+        return math.inf   # some element cannot be covered at all
+
+    sizes = np.bincount(rows, minlength=m)
+    largest = np.zeros(n)
+    np.maximum.at(largest, cols, sizes[rows])
+    u = 1.0 / largest
+    best = 0.0
+    step, stall = 2.0, 0
+    for _ in range(max_iterations):
+        reduced = 1.0 - np.bincount(rows, weights=u[cols], minlength=m)
+        chosen = reduced < 0              # subsets picked by the relaxed problem
+        value = u.sum() + reduced[chosen].sum()
+        if value > best + EPS:
+            best, stall = value, 0
+        else:
+            stall += 1
+            if stall >= 20:
+                step, stall = step / 2, 0
+        if math.ceil(best - EPS) >= upper_bound or step < 1e-4:
+            break
+        gradient = 1.0 - np.bincount(cols[chosen[rows]], minlength=n)
+        norm = float(gradient @ gradient)
+        if norm == 0:
+            break                         # u is optimal for the relaxation
+        u = np.maximum(0.0, u + step * (upper_bound - value) / norm * gradient)
+    return math.ceil(best - EPS)
+
+
+def disjoint_packing_bound(U, S, containing=None):
+    """
+    input:  U: set of elements
+            S: list of subsets
+            containing: optional output of element_frequencies(U, S)
+
+    output: size of a greedy set of elements no two of which share a subset (a lower bound on OPT)
+    """
+    if containing is None:
+        containing = element_frequencies(U, S)
+    used = [False] * len(S)
+    packed = 0
+    for e in sorted(containing, key=lambda x: len(containing[x])):
+        if any(used[i] for i in containing[e]):
+            continue
+        for i in containing[e]:
+            used[i] = True
+        packed += 1
+    return packed
+
+
+def known_optimum(instance_path):
+    """
+    input:  instance_path: path to the .in file
+
+    output: the optimum stored in the .out file next to the instance, or None if there is none
+    """
+    out_path = os.path.splitext(instance_path)[0] + ".out"
+    if not os.path.isfile(out_path):
+        return None
+    with open(out_path, 'r') as f:
+        first = f.readline().split()
+    return int(first[0]) if first else None
+
+
+def global_lower_bound(U, S, upper_bound, instance_path=None):
+    """
+    input:  U: set of elements
+            S: list of subsets
+            upper_bound: size of a known cover (e.g. the greedy one)
+            instance_path: optional path to the .in file, used to look up a known optimum
+
+    output: (bound, source) where bound is the best lower bound found and source names the
+            method that produced it ("optimum", "lagrangian" or "packing")
+    """
+    if instance_path is not None:
+        optimum = known_optimum(instance_path)
+        if optimum is not None:
+            return optimum, "optimum"
+    packing = disjoint_packing_bound(U, S)
+    if packing >= upper_bound:
+        return packing, "packing"
+    lagrangian = lagrangian_bound(U, S, upper_bound)
+    if packing > lagrangian:
+        return packing, "packing"
+    return lagrangian, "lagrangian"
@@ -0,0 +1,86 @@
+"""
+Checkpoint and resume support for long BnB, LS1 and LS2 runs.
+
+A checkpoint is a pickled dictionary holding everything an algorithm needs to continue
+a run where it stopped: the incumbent, the elapsed time, the RNG state and any algorithm
+specific state (the explicit search frontier for BnB, the current solution and iteration
+count for LS1, the temperature and stagnation counter for LS2).
+
+Checkpoints are written to a temporary file in the same directory and then moved into
+place with os.replace, so a run that is killed mid-write always leaves either the previous
+checkpoint or the new one on disk, never a truncated file.
+
+Checkpoint files live next to the .sol/.trace files:
+    ../output/<instance>_<method>_<cutoff>[_<seed>].ckpt
+"""
+
+import os
+import pickle
+import tempfile
+
+CHECKPOINT_INTERVAL = 30   # default number of seconds between two checkpoints
+
+
+def checkpoint_path(instance_path, method, cutoff, seed=None):
+    """
+    input:  instance_path: path to the .in file of the run
+            method: name of the algorithm (BnB, LS2, ...)
+            cutoff: cutoff time of the run in seconds
+            seed: random seed of the run (omitted from the name when None)
+
+    output: path of the checkpoint file belonging to this run
+    """
+    instance_name = os.path.splitext(os.path.basename(instance_path))[0]
+    base_name = f"{instance_name}_{method}_{cutoff}"
+    if seed is not None:
+        base_name += f"_{seed}"
+    return os.path.join("..", "output", f"{base_name}.ckpt")
+
+
+def save_checkpoint(path, state):
+    """
+    input:  path: destination of the checkpoint
+            state: picklable dictionary describing the run
+
+    output: None
+
+    Writes the checkpoint atomically: the state is dumped and fsync'ed to a temporary file
+    in the destination directory, which then replaces the previous checkpoint.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".ckpt-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(path):
+    """
+    input:  path: path of the checkpoint file
+
+    output: the saved state dictionary, or None if there is no checkpoint at path
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def remove_checkpoint(path):
+    """
+    input:  path: path of the checkpoint file
+
+    output: None
+
+    Deletes the checkpoint once a run has finished and its results have been written.
+    """
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,61 @@
+"""
+Compare the Branch and Bound search strategies (dfs, mce, bestfirst, lds).
+
+Every strategy is run on every instance with the same cutoff, and the number of nodes expanded,
+the time at which the best solution was found and the relative error against data/*.out are
+collected into a CSV file (same columns as comprehensive_bnb.csv, plus Strategy and Nodes).
+Since BnB stops once it reaches the global lower bound, the time to the best solution is the
+time to optimal whenever the optimum is known.
+
+Every run is also recorded in the result store, with its strategy and node count.
+
+Example Usage:
+    python3 compare_bnb.py -inst ../data/small*.in -time 60 -csv bnb_strategies.csv
+"""
+
+import argparse
+import csv
+import os
+
+import bnb
+from bounds import known_optimum
+
+
+def compare_strategies(instances, cutoff, strategies=bnb.STRATEGIES, max_frontier=bnb.MAX_FRONTIER):
+    """
+    input:  instances: list of paths to .in files
+            cutoff: time limit (in seconds) for every run
+            strategies: strategies to compare
+            max_frontier: memory cap of the bestfirst priority queue
+
+    output: list of result rows, one per (instance, strategy)
+    """
+    rows = []
+    for instance in instances:
+        dataset = os.path.splitext(os.path.basename(instance))[0]
+        optimum = known_optimum(instance)
+        for strategy in strategies:
+            result = bnb.run_bnb(instance, cutoff, strategy=strategy, max_frontier=max_frontier)
+            rel_err = round((result["cost"] - optimum) / optimum, 2) if optimum else ""
+            rows.append({"Dataset": dataset, "Strategy": strategy, "Time (s)": round(result["time_to_best"], 2),
+                         "Nodes": result["nodes"], "size": result["cost"], "RelErr": rel_err})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare BnB search strategies")
+    parser.add_argument('-inst', nargs='+', required=True, help='Input .in files')
+    parser.add_argument('-time', type=int, required=True, help='Cutoff time in seconds for every run')
+    parser.add_argument('-strategies', nargs='+', choices=bnb.STRATEGIES, default=bnb.STRATEGIES)
+    parser.add_argument('-max_frontier', type=int, default=bnb.MAX_FRONTIER)
+    parser.add_argument('-csv', default='bnb_strategies.csv', help='Output CSV file')
+    args = parser.parse_args()
+
+    rows = compare_strategies(args.inst, args.time, args.strategies, args.max_frontier)
+    with open(args.csv, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["Dataset", "Strategy", "Time (s)", "Nodes", "size", "RelErr"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Coverage backends for the set operations of all algorithms.
+
+All algorithms spend most of their time on a few coverage operations: how many uncovered elements each
+subset covers (greedy), the union of a selection and whether it covers the universe (feasibility checks,
+pruning, BnB), and which subsets could replace one of a selection (LS1 swaps). A backend implements these
+on subset indices, so an algorithm can switch representation with the -backend option:
+
+- set:    no backend object: the algorithms run their own code on Python sets (the reference implementation)
+- bitset: every subset is a packed row of uint64 words in a NumPy matrix (bit k = k-th element of U).
+          Unions, intersections and popcounts work on 64 elements per machine word, and operations over
+          all subsets (e.g. the gain of every subset against the uncovered mask) are a single NumPy call.
+          The matrix is dense (m x n bits), so instances above MAX_BITSET_BYTES are refused up front.
+
+Masks returned by a backend are opaque: pass them back to the same backend. The backend also maps every
+subset object to its index (index_of), since LS1 keeps its solutions as lists of sets.
+"""
+
+import math
+
+import numpy as np
+
+from bounds import EPS
+
+BACKENDS = ["set", "bitset"]
+MAX_BITSET_BYTES = 4 << 30   # largest dense matrix the bitset backend allocates (4 GiB)
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        return np.bitwise_count(words)
+else:
+    # NumPy < 2.0: count the bits of every byte with a lookup table
+    _BYTE_COUNTS = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        return _BYTE_COUNTS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+def check_size(nbytes, what):
+    """
+    input:  nbytes: size of the dense array about to be allocated
+            what: description of the array for the error message
+
+    output: None, raises MemoryError when nbytes is above MAX_BITSET_BYTES
+    """
+    if nbytes > MAX_BITSET_BYTES:
+        raise MemoryError(f"bitset backend: {what} needs {nbytes / 2**30:.1f} GiB, more than the "
+                          f"{MAX_BITSET_BYTES / 2**30:.1f} GiB limit (MAX_BITSET_BYTES); use -backend set")
+
+
+def make_backend(name, U, S):
+    """
+    input:  name: one of BACKENDS
+            U: set of elements
+            S: list of subsets
+
+    output: coverage backend for the instance, or None for "set" (the algorithms then use their own set code)
+    """
+    if name == "set":
+        return None
+    if name == "bitset":
+        return BitsetCoverage(U, S)
+    raise ValueError(f"Unknown coverage backend: {name}")
+
+
+def greedy_cover(backend, prune=False):
+    """
+    input:  backend: coverage backend of the instance
+            prune: drop the chosen subsets that are covered by the other chosen subsets
+
+    output: indices of the subsets picked by the greedy, in the order they were picked
+
+    Repeatedly picks the first subset covering the most uncovered elements, until no subset adds anything.
+    The gains of all subsets are scored in one backend call per step.
+    """
+    indices = []
+    uncovered = backend.full()
+    while True:
+        idx, gain = backend.best(uncovered)
+        if not gain:
+            break
+        indices.append(idx)
+        uncovered = backend.remove_covered(uncovered, idx)
+    if prune:
+        return [idx for idx, r in zip(indices, backend.redundant(indices)) if not r]
+    return indices
+
+
+class BitsetCoverage:
+    """
+    Coverage operations on packed uint64 bitsets.
+    """
+
+    def __init__(self, U, S):
+        elements = sorted(U)
+        position = {e: k for k, e in enumerate(elements)}
+        self.n = len(elements)
+        self.words = max(1, (self.n + 63) // 64)
+        check_size(len(S) * self.words * 8, f"the {len(S)} x {self.n} subset matrix")
+        self.index_of = {id(s): i for i, s in enumerate(S)}
+
+        rows = np.fromiter((i for i, s in enumerate(S) for e in s if e in position), dtype=np.int64)
+        cols = np.fromiter((position[e] for s in S for e in s if e in position), dtype=np.int64)
+        self.rows = np.zeros((len(S), self.words), dtype=np.uint64)
+        np.bitwise_or.at(self.rows, (rows, cols >> 6), np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64)))
+
+        self.full_mask = np.zeros(self.words, dtype=np.uint64)
+        bits = np.arange(self.n)
+        np.bitwise_or.at(self.full_mask, bits >> 6, np.left_shift(np.uint64(1), (bits & 63).astype(np.uint64)))
+        self._full_bytes = self.full_mask.tobytes()   # comparing bytes is cheaper than np.array_equal on a few words
+
+    def full(self):
+        return self.full_mask.copy()
+
+    def empty(self):
+        return np.zeros(self.words, dtype=np.uint64)
+
+    def union(self, indices):
+        if len(indices) == 0:
+            return self.empty()
+        return np.bitwise_or.reduce(self.rows[list(indices)], axis=0)
+
+    def add(self, mask, i):
+        return mask | self.rows[i]
+
+    def covers_all(self, indices):
+        return self.is_full(self.union(indices))
+
+    def is_full(self, mask):
+        return mask.tobytes() == self._full_bytes
+
+    def gains(self, uncovered):
+        """number of elements of 'uncovered' covered by every subset, in one pass over the matrix"""
+        return popcount(self.rows & uncovered).sum(axis=1)
+
+    def best(self, uncovered):
+        """(index, gain) of the first subset covering the most elements of 'uncovered'"""
+        gains = self.gains(uncovered)
+        idx = int(gains.argmax())
+        return idx, int(gains[idx])
+
+    def remove_covered(self, uncovered, i):
+        return uncovered & ~self.rows[i]
+
+    def _others(self, selected):
+        """others[k] = union of the rows before k | union of the rows after k (prefix / suffix ORs)"""
+        before = np.bitwise_or.accumulate(selected, axis=0)
+        after = np.bitwise_or.accumulate(selected[::-1], axis=0)[::-1]
+        others = np.zeros_like(selected)
+        others[1:] |= before[:-1]
+        others[:-1] |= after[1:]
+        return others
+
+    def redundant(self, indices):
+        """for every subset in 'indices', whether it is covered by the others"""
+        if len(indices) == 0:
+            return np.zeros(0, dtype=bool)
+        selected = self.rows[list(indices)]
+        return ~np.any(selected & ~self._others(selected), axis=1)
+
+    def first_redundant(self, indices):
+        """position in 'indices' of the first subset whose removal leaves a cover of U, or -1"""
+        if len(indices) == 0:
+            return -1
+        # on a cover this is the same as redundant(), but a non-cover must keep all its subsets, as in the set code
+        hits = np.flatnonzero(np.all(self._others(self.rows[list(indices)]) == self.full_mask, axis=1))
+        return int(hits[0]) if len(hits) else -1
+
+    def covering(self, indices, pos):
+        """indices of all subsets that can replace indices[pos] and keep the selection a cover"""
+        missing = self.full_mask & ~self.union(indices[:pos] + indices[pos + 1:])
+        return np.flatnonzero(~np.any(missing & ~self.rows, axis=1)).tolist()
+
+    def dual_bound(self, mask, start):
+        """
+        LP dual lower bound on the number of subsets S[start:] needed to cover the elements not in mask:
+        the ceiling of sum_e 1 / g(e), g(e) = the most uncovered elements covered by one of them containing e
+        """
+        uncovered = self.full_mask & ~mask
+        remaining = int(popcount(uncovered).sum())
+        if remaining == 0:
+            return 0
+        rows = self.rows[start:] & uncovered
+        gains = popcount(rows).sum(axis=1).astype(np.int64)
+        # visit the subsets from the largest gain down: an element first covered at gain g has g(e) = g
+        order = np.argsort(-gains, kind="stable")
+        gains = gains[order]
+        reached = popcount(np.bitwise_or.accumulate(rows[order], axis=0)).sum(axis=1)
+        if len(reached) == 0 or reached[-1] < remaining:
+            return float("inf")  # If an element is uncovered by any available subset
+        last = np.flatnonzero(np.diff(gains, append=0))   # last subset of every distinct gain
+        last = last[gains[last] > 0]
+        new = np.diff(reached[last], prepend=0)            # elements first covered at each gain
+        return math.ceil(float((new / gains[last]).sum()) - EPS)
@@ -0,0 +1,210 @@
+'''
+Synthetic Instance Generator (scaling benchmarks)
+
+This file writes random Minimum Set Cover instances in the same .in format as the files in data/:
+    first line: n m                        (number of elements, number of subsets)
+    next m lines: k e_1 e_2 ... e_k        (size of the subset followed by its elements, 1..n)
+
+Families:
+  uniform:  subset sizes uniform in [1, 2*avg-1], elements drawn uniformly
+  powerlaw: subset sizes Pareto distributed with mean ~avg, elements drawn with Zipf popularity (exponent alpha)
+  block:    elements are split into -blocks contiguous blocks; each subset belongs to one block and draws
+            its elements from it, except for a fraction -cross drawn from anywhere
+  planted:  the elements are partitioned into k disjoint subsets of size b = n // k (n is rounded down to k*b),
+            hidden among m - k noise subsets of size at most b. No subset covers more than b elements, so every
+            cover needs at least n / b = k subsets: the planted partition is optimal and k is written to the .out file
+
+In every family except planted, each element is first assigned to a random subset (to one of its own block
+for the block family), so every instance has a cover. Subsets are generated and written one at a time,
+so instances with 10^6 subsets do not have to fit in memory.
+
+The same -seed always produces the same instance.
+
+Usage:
+  python generate.py -family planted -n 100000 -m 1000000 -k 500 -seed 1 -out ../data/gen_planted1
+  (writes ../data/gen_planted1.in and, for the planted family, ../data/gen_planted1.out)
+'''
+
+import argparse
+import random
+import time
+
+FAMILIES = ['uniform', 'powerlaw', 'block', 'planted']
+
+
+def anchor_elements(elements, set_ids, rng):
+    '''
+    input: elements: iterable of elements
+           set_ids: list of subset indices the elements may be assigned to
+           rng: random.Random instance
+    output: dictionary mapping a subset index to the list of elements anchored to it
+    '''
+    anchors = {}
+    for e in elements:
+        anchors.setdefault(rng.choice(set_ids), []).append(e)
+    return anchors
+
+
+def uniform_sets(n, m, avg, rng):
+    '''
+    input: n: number of elements
+           m: number of subsets
+           avg: average subset size
+           rng: random.Random instance
+    output: generator of m subsets (sets of elements)
+    '''
+    anchors = anchor_elements(range(1, n + 1), range(m), rng)
+    population = range(1, n + 1)
+    for i in range(m):
+        size = min(n, rng.randint(1, 2 * avg - 1))
+        s = set(rng.sample(population, size))
+        s.update(anchors.get(i, ()))
+        yield s
+
+
+def powerlaw_sets(n, m, avg, alpha, rng):
+    '''
+    input: n: number of elements
+           m: number of subsets
+           avg: average subset size
+           alpha: exponent of the Zipf element popularity (element of rank r has weight 1/r^alpha)
+           rng: random.Random instance
+    output: generator of m subsets (sets of elements)
+    '''
+    anchors = anchor_elements(range(1, n + 1), range(m), rng)
+    ranked = list(range(1, n + 1))   # ranked[r] is the element of popularity rank r
+    rng.shuffle(ranked)
+    cum_weights = []
+    total = 0.0
+    for r in range(1, n + 1):
+        total += 1.0 / r ** alpha
+        cum_weights.append(total)
+    shape = 2.0                      # Pareto shape of the subset sizes (mean = scale * shape / (shape - 1))
+    scale = avg * (shape - 1) / shape
+    for i in range(m):
+        size = max(1, min(n, int(scale * rng.paretovariate(shape))))
+        s = set(rng.choices(ranked, cum_weights=cum_weights, k=size))
+        s.update(anchors.get(i, ()))
+        yield s
+
+
+def block_sets(n, m, avg, blocks, cross, rng):
+    '''
+    input: n: number of elements
+           m: number of subsets
+           avg: average subset size
+           blocks: number of element blocks (subset i belongs to block i % blocks)
+           cross: fraction of the elements of a subset drawn from outside its block
+           rng: random.Random instance
+    output: generator of m subsets (sets of elements)
+    '''
+    blocks = max(1, min(blocks, n, m))
+    bounds = [(b * n // blocks + 1, (b + 1) * n // blocks + 1) for b in range(blocks)]
+    anchors = {}
+    for b, (lo, hi) in enumerate(bounds):
+        anchors.update(anchor_elements(range(lo, hi), range(b, m, blocks), rng))
+    population = range(1, n + 1)
+    for i in range(m):
+        lo, hi = bounds[i % blocks]
+        size = rng.randint(1, 2 * avg - 1)
+        outside = sum(1 for _ in range(size) if rng.random() < cross)
+        s = set(rng.sample(range(lo, hi), min(hi - lo, size - outside)))
+        s.update(rng.sample(population, min(n, outside)))
+        s.update(anchors.get(i, ()))
+        yield s
+
+
+def planted_sets(n, m, k, avg, rng):
+    '''
+    input: n: number of elements (must be k * b for the block size b)
+           m: number of subsets (k planted + m - k noise)
+           k: size of the planted optimal cover
+           avg: average size of the noise subsets (capped at the block size)
+           rng: random.Random instance
+    output: generator of m subsets (sets of elements)
+    '''
+    b = n // k
+    order = list(range(1, n + 1))
+    rng.shuffle(order)
+    planted_at = dict(zip(sorted(rng.sample(range(m), k)), range(k)))
+    population = range(1, n + 1)
+    for i in range(m):
+        if i in planted_at:
+            j = planted_at[i]
+            yield set(order[j * b:(j + 1) * b])
+        else:
+            yield set(rng.sample(population, min(b, rng.randint(1, 2 * avg - 1))))
+
+
+def write_instance(path, n, m, subsets):
+    '''
+    input: path: path of the .in file to write
+           n: number of elements
+           m: number of subsets
+           subsets: iterable of m subsets
+    output: None
+    '''
+    with open(path, 'w') as f:
+        f.write(f"{n} {m}\n")
+        for s in subsets:
+            f.write(f"{len(s)} {' '.join(map(str, sorted(s)))}\n")
+
+
+def generate(family, n, m, out, seed=None, avg=10, k=None, alpha=1.0, blocks=10, cross=0.1):
+    '''
+    input: family: one of FAMILIES
+           n: number of elements
+           m: number of subsets
+           out: output path without extension
+           seed: random seed
+           avg: average subset size
+           k: planted optimum (planted family only)
+           alpha: Zipf exponent (powerlaw family only)
+           blocks, cross: number of blocks and fraction of cross-block elements (block family only)
+    output: (n, m) actually written (the planted family rounds n down to a multiple of k)
+    '''
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown family: {family}")
+    if n < 1 or m < 1 or avg < 1:
+        raise ValueError("n, m and avg must be positive")
+    rng = random.Random(seed)
+    if family == 'uniform':
+        subsets = uniform_sets(n, m, avg, rng)
+    elif family == 'powerlaw':
+        subsets = powerlaw_sets(n, m, avg, alpha, rng)
+    elif family == 'block':
+        subsets = block_sets(n, m, avg, blocks, cross, rng)
+    else:
+        if k is None or not 1 <= k <= min(n, m):
+            raise ValueError("the planted family needs 1 <= k <= min(n, m)")
+        n = (n // k) * k
+        subsets = planted_sets(n, m, k, avg, rng)
+
+    write_instance(f"{out}.in", n, m, subsets)
+    if family == 'planted':
+        with open(f"{out}.out", 'w') as f:
+            f.write(f"{k}\n")
+    return n, m
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic Minimum Set Cover instance generator")
+    parser.add_argument('-family', choices=FAMILIES, required=True)
+    parser.add_argument('-n', type=int, required=True, help='Number of elements')
+    parser.add_argument('-m', type=int, required=True, help='Number of subsets')
+    parser.add_argument('-out', required=True, help='Output path without extension')
+    parser.add_argument('-seed', type=int, required=False, help='Random seed')
+    parser.add_argument('-avg', type=int, default=10, help='Average subset size')
+    parser.add_argument('-k', type=int, required=False, help='Planted optimum (planted family)')
+    parser.add_argument('-alpha', type=float, default=1.0, help='Zipf exponent of element popularity (powerlaw family)')
+    parser.add_argument('-blocks', type=int, default=10, help='Number of element blocks (block family)')
+    parser.add_argument('-cross', type=float, default=0.1, help='Fraction of cross-block elements (block family)')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    n, m = generate(args.family, args.n, args.m, args.out, args.seed, args.avg, args.k, args.alpha,
+                    args.blocks, args.cross)
+    print(f"Wrote {args.out}.in (n={n}, m={m}) in {time.time() - start_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ This file implements a hill climbing algorithm to solve the Minimum Set Cover pr
 The algorithm starts with a greedy approximation solution and iteratively improves it by:
 1. Trying to remove redundant sets while maintaining coverage
 2. Swapping sets to explore new solution spaces
+Swaps keep the cover size, so the search keeps moving sideways until the cutoff; the current and best
+solutions are checkpointed periodically so a killed run can be continued with -resume.
 
 Usage:
   python hillclimbing.py -inst <filename> -alg LS1 -time <cutoff in seconds> -seed <random seed>
@@ -14,27 +16,37 @@ Arguments:
   -alg: Algorithm to use (LS1 for this file)
   -time: Cutoff time in seconds
   -seed: Random seed for reproducibility
+  -resume: Continue from the last checkpoint of this run
+  -ckpt_interval: Seconds between two checkpoints
+  -backend: Coverage backend for the set operations, set (default) or bitset (coverage.py)
 
 Output:
-  Creates two files in the 'output' directory:
-  - <instance>_LS1_<cutoff>_<seed>.sol: Solution file with the best solution found
-  - <instance>_LS1_<cutoff>_<seed>.trace: Trace file with timestamps and solution qualities
+  Records the run in the result store (resultstore.py): the best solution found, the trace of timestamps
+  and solution qualities, and the global lower bound. The legacy files in the '../output' directory
+  (<instance>_LS1_<cutoff>_<seed>.sol/.trace/.cert) are written when asked.
 '''
 
 
 import argparse
 import random
 import time
-import os
 import copy
+from bounds import global_lower_bound
+from resultstore import STORE_PATH, configure, save_run
+from checkpoint import CHECKPOINT_INTERVAL, checkpoint_path, save_checkpoint, load_checkpoint, remove_checkpoint
+from coverage import BACKENDS, greedy_cover, make_backend
 
 
-def approx_msc(U, S):
+def approx_msc(U, S, backend=None):
     '''
     input: U = {x_1, x_2, ..., x_n}: set of n elements
            S = {S_1, S_2, ..., S_m} where S_i is a subset of U: list of sets
+           backend: optional coverage backend (coverage.py) doing the set operations
     output: C is a subset of S such that C covers all elements in U: list of sets
     '''
+    if backend is not None:
+        return [S[idx] for idx in greedy_cover(backend, prune=True)]
+
     C = []                # initialize the cover as empty
     uncovered = set(U)    # all elements in U are initially uncovered
     while uncovered:      # while there are still uncovered elements
@@ -82,14 +94,18 @@ def parse_instance(filepath):
     U = set(range(1, n + 1))
     return U, S, subset_indices
 
-def is_solution_feasible(solution, U):
+def is_solution_feasible(solution, U, backend=None):
     '''
     Check if a solution covers all elements
+    (solution holds subsets of S; a backend finds their indices by identity)
     '''
+    if backend is not None:
+        return backend.covers_all([backend.index_of[id(s)] for s in solution])
     covered = set().union(*solution) if solution else set()
     return covered == U
 
-def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=1000, seed=None, cutoff_time=None):
+def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=1000, seed=None, cutoff_time=None, lower_bound=0,
+                  backend=None, checkpoint_file=None, resume_state=None, checkpoint_interval=CHECKPOINT_INTERVAL):
     '''
     Hill Climbing algorithm for Minimum Set Cover
     input: U = {x_1, x_2, ..., x_n}: set of n elements
@@ -99,30 +115,62 @@ def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=10
            max_iterations: maximum number of iterations
            seed: random seed for reproducibility
            cutoff_time: maximum running time in seconds
+           lower_bound: global lower bound on the cover size; the search stops once it is reached
+           backend: optional coverage backend (coverage.py) for the feasibility checks and swaps
+           checkpoint_file: where to write the periodic checkpoints (None = no checkpoints)
+           resume_state: a loaded checkpoint to continue from
+           checkpoint_interval: number of seconds between two checkpoints
     output: best_solution: list of sets representing the best solution found
             solution_indices: list of indices of the selected subsets
             trace: list of (timestamp, solution quality) pairs
     '''
     if seed is not None:
         random.seed(seed)
-    
-    # Start with a solution (either provided or generated by approx_msc)
-    current_solution = initial_solution if initial_solution is not None else approx_msc(U, S)
-    
-    # Keep track of the best solution found
-    best_solution = copy.deepcopy(current_solution)
+
+    # Checkpoints store subsets by their index in S (the swaps compare the subsets of the solution by identity)
+    position = {id(s): i for i, s in enumerate(S)}
+
+    if resume_state is not None:
+        # Continue a checkpointed run, shifting the clock back by the time already spent
+        current_solution = [S[i] for i in resume_state["current_solution"]]
+        best_solution = copy.deepcopy([S[i] for i in resume_state["best_solution"]])
+        trace = resume_state["trace"]
+        iteration = resume_state["iteration"]
+        start_time = time.time() - resume_state["elapsed"]
+        print(f"Resuming LS1 from checkpoint at {resume_state['elapsed']:.2f}s "
+              f"(best={len(best_solution)}, iteration={iteration})")
+    else:
+        # Start with a solution (either provided or generated by approx_msc)
+        current_solution = initial_solution if initial_solution is not None else approx_msc(U, S, backend)
+
+        # Keep track of the best solution found (best_solution holds copies, see the checkpoint below)
+        best_solution = copy.deepcopy(current_solution)
+
+        # For writing the trace file
+        trace = [(0.0, len(best_solution))]
+        start_time = time.time()
+        iteration = 0
     best_cost = len(best_solution)
-    
-    # For writing the trace file
-    trace = [(0.0, best_cost)]
-    start_time = time.time()
-    
+    # The best solution as subsets of S (solution lists are never modified in place, a reference is enough)
+    best_sets = current_solution if resume_state is None else [S[i] for i in resume_state["best_solution"]]
+    last_checkpoint = time.time()
+
     # Main Hill Climbing loop
-    iteration = 0
     while iteration < max_iterations:
         # Check if we've exceeded the cutoff time
         if cutoff_time is not None and time.time() - start_time >= cutoff_time:
             break
+
+        # Stop once the best solution meets the lower bound, it is provably optimal
+        if best_cost <= lower_bound:
+            break
+
+        if checkpoint_file is not None and time.time() - last_checkpoint >= checkpoint_interval:
+            save_checkpoint(checkpoint_file, {
+                "elapsed": time.time() - start_time, "iteration": iteration, "trace": trace,
+                "current_solution": [position[id(s)] for s in current_solution],
+                "best_solution": [position[id(s)] for s in best_sets]})
+            last_checkpoint = time.time()
             
         # Try to improve the solution
         improved = False
@@ -133,13 +181,14 @@ def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=10
             new_solution = current_solution[:i] + current_solution[i+1:]
             
             # Check if the new solution is feasible
-            if is_solution_feasible(new_solution, U):
+            if is_solution_feasible(new_solution, U, backend):
                 # If it's feasible and better, update the current solution
                 current_solution = new_solution
                 
                 # Check if it's also the best solution found so far
                 if len(current_solution) < best_cost:
                     best_solution = copy.deepcopy(current_solution)
+                    best_sets = current_solution
                     best_cost = len(best_solution)
                     elapsed = time.time() - start_time
                     trace.append((elapsed, best_cost))
@@ -148,7 +197,19 @@ def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=10
                 break
         
         # Try swapping a subset with another (if it keeps the solution feasible)
-        if not improved:
+        if not improved and backend is not None:
+            # The backend finds all subsets that can replace subset_in in one call; take the first one
+            # (in the order of S) that is not in the solution, like the loop below
+            indices = [backend.index_of[id(s)] for s in current_solution]
+            for i in range(len(current_solution)):
+                for j in backend.covering(indices, i):
+                    if S[j] not in current_solution:
+                        current_solution = current_solution[:i] + [S[j]] + current_solution[i+1:]
+                        improved = True
+                        break
+                if improved:
+                    break
+        elif not improved:
             for i, subset_in in enumerate(current_solution):
                 for subset_out in S:
                     if subset_out in current_solution:
@@ -172,6 +233,10 @@ def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=10
             break
         
         iteration += 1
+
+    if checkpoint_file is not None:
+        # The run finished normally, the checkpoint is no longer needed
+        remove_checkpoint(checkpoint_file)
     
     # Convert the solution to original indices
     solution_indices = [subset_indices[frozenset(s)] for s in best_solution]
@@ -179,38 +244,6 @@ def hill_climbing(U, S, subset_indices, initial_solution=None, max_iterations=10
     return best_solution, solution_indices, trace
 
 
-def write_output(instance, method, cutoff, seed, solution, trace):
-    '''
-    Write output files
-    '''
-    # Extract the base name of the instance file
-    instance_name = os.path.splitext(os.path.basename(instance))[0]
-    
-    # Create output directory if it doesn't exist
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write solution file
-    solution_file = f"{output_dir}/{instance_name}_{method}_{cutoff}"
-    if seed is not None:
-        solution_file += f"_{seed}"
-    solution_file += ".sol"
-    
-    with open(solution_file, 'w') as f:
-        f.write(f"{len(solution)}\n")
-        f.write(" ".join(map(str, solution)) + "\n")
-    
-    # Write trace file
-    trace_file = f"{output_dir}/{instance_name}_{method}_{cutoff}"
-    if seed is not None:
-        trace_file += f"_{seed}"
-    trace_file += ".trace"
-    
-    with open(trace_file, 'w') as f:
-        for time_stamp, quality in trace:
-            f.write(f"{time_stamp:.2f} {quality}\n")
-
-
 def read_input(filename):
     with open(filename, 'r') as f:
         lines = f.readlines()
@@ -228,7 +261,7 @@ def read_input(filename):
     U = set(range(1, n + 1))
     return U, S, subset_indices
 
-def run(instance, method, cutoff_time, seed=None):
+def run(instance, method, cutoff_time, seed=None, resume=False, checkpoint_interval=CHECKPOINT_INTERVAL, backend="set"):
     """
     Run the Hill Climbing algorithm with the given parameters
     
@@ -236,21 +269,43 @@ def run(instance, method, cutoff_time, seed=None):
     :param method: Algorithm method (LS1 for Hill Climbing)
     :param cutoff_time: Maximum runtime in seconds
     :param seed: Random seed for reproducibility
+    :param resume: Continue from the last checkpoint of this run, if there is one
+    :param checkpoint_interval: Number of seconds between two checkpoints
+    :param backend: Coverage backend, 'set' or 'bitset' (coverage.py)
     :return: Solution and trace
     """
     # Read instance
     U, S, subset_indices = parse_instance(instance)
+    cover = make_backend(backend, U, S)
+    ckpt_path = checkpoint_path(instance, method, cutoff_time, seed)
+    resume_state = load_checkpoint(ckpt_path) if resume else None
+    
+    # Greedy start, also used as the target of the lower bound computation
+    if resume_state is None:
+        initial_solution = approx_msc(U, S, cover)
+        incumbent = len(initial_solution)
+    else:
+        initial_solution = None
+        incumbent = len(resume_state["best_solution"])
+    bound, source = global_lower_bound(U, S, incumbent, instance)
     
-    # Run Hill Climbing
+    # Run Hill Climbing (the time spent before a resume counts towards the elapsed time)
+    start_time = time.time() - (resume_state["elapsed"] if resume_state is not None else 0)
     solution, solution_indices, trace = hill_climbing(
         U, S, subset_indices, 
+        initial_solution=initial_solution,
         max_iterations=1000000, 
         seed=seed,
-        cutoff_time=cutoff_time
+        cutoff_time=cutoff_time,
+        lower_bound=bound,
+        backend=cover,
+        checkpoint_file=ckpt_path,
+        resume_state=resume_state,
+        checkpoint_interval=checkpoint_interval
     )
     
-    # Write output files
-    write_output(instance, method, cutoff_time, seed, solution_indices, trace)
+    # Record the run
+    save_run(instance, method, cutoff_time, seed, solution_indices, trace, time.time() - start_time, bound, source)
     
     return solution_indices, trace
 
@@ -260,11 +315,17 @@ def main():
     parser.add_argument('-alg', required=True, choices=['BnB', 'Approx', 'LS1', 'LS2'], help='Algorithm to use')
     parser.add_argument('-time', type=int, required=True, help='Cutoff time in seconds')
     parser.add_argument('-seed', type=int, required=False, help='Random seed')
+    parser.add_argument('-resume', action='store_true', help='Continue from the last checkpoint of this run')
+    parser.add_argument('-ckpt_interval', type=int, default=CHECKPOINT_INTERVAL, help='Seconds between checkpoints')
+    parser.add_argument('-backend', choices=BACKENDS, default='set', help='Coverage backend')
+    parser.add_argument('-store', default=STORE_PATH, help='Result store the run is recorded in')
+    parser.add_argument('-legacy', action='store_true', help='Also write the legacy .sol/.trace files to ../output')
     
     args = parser.parse_args()
+    configure(store=args.store, legacy=args.legacy)
     
     if args.alg == 'LS1':
-        run(args.inst, args.alg, args.time, args.seed)
+        run(args.inst, args.alg, args.time, args.seed, args.resume, args.ckpt_interval, args.backend)
     else:
         print(f"Algorithm {args.alg} not implemented yet.")
 
@@ -2,6 +2,9 @@ import approx
 import simulatedannealing
 import hillclimbing
 import bnb
+import resultstore
+from coverage import BACKENDS
+from checkpoint import CHECKPOINT_INTERVAL
 
 # main.py
 import argparse
@@ -16,22 +19,33 @@ def main():
     parser.add_argument('-alg', required=True, choices=['BnB', 'Approx', 'LS1', 'LS2'], help='Algorithm to use')
     parser.add_argument('-time', type=int, required=True, help='Cutoff time in seconds')
     parser.add_argument('-seed', type=int, required=False, help='Random seed')
+    parser.add_argument('-resume', action='store_true', help='Continue BnB/LS1/LS2 from the last checkpoint of this run')
+    parser.add_argument('-ckpt_interval', type=int, default=CHECKPOINT_INTERVAL, help='Seconds between checkpoints')
+    parser.add_argument('-store', default=resultstore.STORE_PATH, help='Result store the run is recorded in')
+    parser.add_argument('-legacy', action='store_true', help='Also write the legacy .sol/.trace files to ../output')
+    parser.add_argument('-strategy', choices=bnb.STRATEGIES, default='dfs', help='BnB search strategy')
+    parser.add_argument('-max_frontier', type=int, default=bnb.MAX_FRONTIER, help='Memory cap of the bestfirst BnB queue')
+    parser.add_argument('-backend', choices=BACKENDS, default='set', help='Coverage backend for the set operations')
 
     args = parser.parse_args()
 
+    resultstore.configure(store=args.store, legacy=args.legacy)
+
     # Set random seed
     random.seed(args.seed)
 
     # Dispatch to the selected algorithm
     start_time = time.time()
     if args.alg == 'BnB':
-        bnb.run(args.inst, args.time, args.seed)
+        bnb.run(args.inst, args.time, args.seed, args.resume, args.ckpt_interval, args.strategy, args.max_frontier,
+                args.backend)
     elif args.alg == 'Approx':
-        approx.run(args.inst)
+        approx.run(args.inst, args.time, args.seed, args.backend)
     elif args.alg == 'LS1':
-        ls1.run(args.inst, args.time, args.seed)
+        hillclimbing.run(args.inst, args.alg, args.time, args.seed, args.resume, args.ckpt_interval, args.backend)
     elif args.alg == 'LS2':
-        simulatedannealing.process_file(args.inst, args.alg, args.time, args.seed)
+        simulatedannealing.process_file(args.inst, args.alg, args.time, args.seed, args.resume, args.ckpt_interval,
+                                        args.backend)
     else:
         print("Unknown algorithm.")
         sys.exit(1)
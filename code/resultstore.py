@@ -0,0 +1,290 @@
+"""
+Result store for all algorithms.
+
+Instead of one .sol and one .trace file per run, every run is appended to a single SQLite database
+(../output/results.db by default):
+    runs(id, instance, method, cutoff, seed, created, elapsed, size, lower_bound, bound_source, solution, extra)
+    trace(run_id, time, quality)
+'solution' holds the 1-indexed subset indices separated by spaces, and 'extra' holds algorithm specific
+data as JSON (e.g. the LS2 temperature schedule or the BnB node count).
+
+Parallel runs can write to the same store: the database uses write-ahead logging, every run is written
+in a single IMMEDIATE transaction, and writers wait up to BUSY_TIMEOUT seconds for the lock.
+
+The legacy layout (<instance>_<method>_<cutoff>[_<seed>].sol/.trace, plus .cert and .schedule) is still
+produced when asked, either while running (-legacy in main.py) or afterwards with the exporter.
+
+Example Usage:
+    python3 resultstore.py best                                  # best solution per instance
+    python3 resultstore.py ttq -inst large1 -target 50           # time to reach size <= 50, per run
+    python3 resultstore.py export -output ../output              # write the legacy .sol/.trace files
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+STORE_PATH = os.path.join("..", "output", "results.db")
+BUSY_TIMEOUT = 60   # seconds a writer waits for the database lock
+
+# Where save_run writes to; changed with configure() (main.py -store / -legacy)
+settings = {"store": STORE_PATH, "legacy": False, "legacy_dir": os.path.join("..", "output")}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    instance TEXT NOT NULL,
+    method TEXT NOT NULL,
+    cutoff INTEGER NOT NULL,
+    seed INTEGER,
+    created REAL NOT NULL,
+    elapsed REAL,
+    size INTEGER NOT NULL,
+    lower_bound INTEGER,
+    bound_source TEXT,
+    solution TEXT NOT NULL,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS trace (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    time REAL NOT NULL,
+    quality INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_instance ON runs(instance, size);
+CREATE INDEX IF NOT EXISTS trace_run ON trace(run_id, time);
+"""
+
+
+def configure(store=None, legacy=None, legacy_dir=None):
+    """
+    input:  store: path of the SQLite database runs are recorded in
+            legacy: also write the legacy .sol/.trace files for every run
+            legacy_dir: directory of the legacy files
+
+    output: None (arguments left as None keep their current value)
+    """
+    if store is not None:
+        settings["store"] = store
+    if legacy is not None:
+        settings["legacy"] = legacy
+    if legacy_dir is not None:
+        settings["legacy_dir"] = legacy_dir
+
+
+def connect(store=None):
+    """
+    input:  store: path of the database (default: the configured store)
+
+    output: sqlite3 connection with the schema created, WAL enabled and the busy timeout set
+    """
+    store = store or settings["store"]
+    directory = os.path.dirname(store)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(store, timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def save_run(instance_path, method, cutoff, seed, solution, trace, elapsed=None, lower_bound=None,
+             bound_source=None, extra=None):
+    """
+    input:  instance_path: path to the .in file of the run
+            method: name of the algorithm (Approx, BnB, LS1, LS2)
+            cutoff: cutoff time of the run in seconds
+            seed: random seed of the run (None for deterministic algorithms)
+            solution: list of 1-indexed subset indices
+            trace: list of (timestamp, quality) pairs
+            elapsed: running time of the algorithm in seconds
+            lower_bound, bound_source: global lower bound of the instance and how it was obtained
+            extra: optional JSON-serializable dictionary with algorithm specific data
+
+    output: id of the new run
+
+    Records the run in the configured store, and also writes the legacy files when configured to.
+    """
+    instance_name = os.path.splitext(os.path.basename(instance_path))[0]
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute(
+            "INSERT INTO runs (instance, method, cutoff, seed, created, elapsed, size, lower_bound, bound_source,"
+            " solution, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (instance_name, method, cutoff, seed, time.time(), elapsed, len(solution), lower_bound, bound_source,
+             " ".join(map(str, solution)), json.dumps(extra) if extra else None))
+        run_id = cursor.lastrowid
+        conn.executemany("INSERT INTO trace (run_id, time, quality) VALUES (?, ?, ?)",
+                         [(run_id, t, q) for t, q in trace])
+        conn.execute("COMMIT")
+    except BaseException:
+        # BEGIN IMMEDIATE itself can fail (e.g. busy timeout); only roll back a transaction that was started
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    if settings["legacy"]:
+        write_legacy(settings["legacy_dir"], instance_name, method, cutoff, seed, solution, trace,
+                     lower_bound, bound_source, extra)
+    return run_id
+
+
+def write_legacy(output_dir, instance_name, method, cutoff, seed, solution, trace, lower_bound=None,
+                 bound_source=None, extra=None):
+    """
+    input:  output_dir: directory to write the files to
+            instance_name: instance name without extension (e.g. small1)
+            method, cutoff, seed, solution, trace, lower_bound, bound_source, extra: as in save_run
+
+    output: None
+
+    Writes <instance>_<method>_<cutoff>[_<seed>].sol and .trace, plus .cert when the lower bound is
+    known and .schedule when the run has an LS2 schedule.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = f"{instance_name}_{method}_{cutoff}"
+    if seed is not None:
+        base_name += f"_{seed}"
+    base_path = os.path.join(output_dir, base_name)
+
+    with open(f"{base_path}.sol", 'w') as f:
+        f.write(f"{len(solution)}\n")
+        f.write(" ".join(map(str, solution)) + "\n")
+    with open(f"{base_path}.trace", 'w') as f:
+        for timestamp, quality in trace:
+            f.write(f"{timestamp:.2f} {quality}\n")
+    if lower_bound is not None:
+        with open(f"{base_path}.cert", 'w') as f:
+            f.write(f"lower_bound {lower_bound} {bound_source}\n")
+            f.write(f"size {len(solution)}\n")
+            f.write(f"gap {len(solution) - lower_bound}\n")
+    if extra and extra.get("schedule"):
+        # one line per schedule sample: time, temperature, acceptance rate of worse moves ('-' when no worse
+        # move was proposed in the epoch), reheats so far
+        with open(f"{base_path}.schedule", 'w') as f:
+            for timestamp, temp, rate, reheats in extra["schedule"]:
+                rate = "-" if rate is None else f"{rate:.3f}"
+                f.write(f"{timestamp:.2f} {temp:.4f} {rate} {reheats}\n")
+
+
+def best_per_instance(store=None, method=None):
+    """
+    input:  store: path of the database (default: the configured store)
+            method: only consider runs of this algorithm
+
+    output: list of (instance, best size, method, cutoff, seed, run id, lower bound), one per instance
+    """
+    conn = connect(store)
+    try:
+        where = "WHERE method = ?" if method else ""
+        params = (method,) if method else ()
+        return conn.execute(
+            f"SELECT instance, size, method, cutoff, seed, id, lower_bound FROM ("
+            f"  SELECT *, ROW_NUMBER() OVER (PARTITION BY instance ORDER BY size, elapsed, id) AS rank"
+            f"  FROM runs {where}"
+            f") WHERE rank = 1 ORDER BY instance", params).fetchall()
+    finally:
+        conn.close()
+
+
+def time_to_quality(instance, target, store=None, method=None):
+    """
+    input:  instance: instance name without extension
+            target: solution size to reach
+            store: path of the database (default: the configured store)
+            method: only consider runs of this algorithm
+
+    output: list of (run id, method, cutoff, seed, time) with the first time each run reached a solution of
+            size <= target (None if it never did)
+    """
+    conn = connect(store)
+    try:
+        where = "AND r.method = ?" if method else ""
+        params = (target, instance) + ((method,) if method else ())
+        return conn.execute(
+            f"SELECT r.id, r.method, r.cutoff, r.seed,"
+            f"       (SELECT MIN(t.time) FROM trace t WHERE t.run_id = r.id AND t.quality <= ?)"
+            f" FROM runs r WHERE r.instance = ? {where} ORDER BY r.id", params).fetchall()
+    finally:
+        conn.close()
+
+
+def latest_solutions(store=None, instance=None):
+    """
+    input:  store: path of the database (default: the configured store)
+            instance: only consider runs of this instance
+
+    output: list of (run id, instance, method, cutoff, seed, size, solution) for the latest run of every
+            (instance, method, cutoff, seed), with the solution as stored (1-indexed, space separated)
+    """
+    conn = connect(store)
+    try:
+        where = "WHERE instance = ?" if instance else ""
+        params = (instance,) if instance else ()
+        return conn.execute(
+            f"SELECT id, instance, method, cutoff, seed, size, solution FROM runs"
+            f" WHERE id IN (SELECT MAX(id) FROM runs {where} GROUP BY instance, method, cutoff, seed)"
+            f" ORDER BY id", params).fetchall()
+    finally:
+        conn.close()
+
+
+def export_legacy(output_dir, store=None, instance=None):
+    """
+    input:  output_dir: directory to write the legacy files to
+            store: path of the database (default: the configured store)
+            instance: only export runs of this instance
+
+    output: number of runs exported
+
+    Writes the legacy files of the latest run of every (instance, method, cutoff, seed).
+    """
+    conn = connect(store)
+    try:
+        where = "WHERE instance = ?" if instance else ""
+        params = (instance,) if instance else ()
+        runs = conn.execute(
+            f"SELECT id, instance, method, cutoff, seed, solution, lower_bound, bound_source, extra FROM runs"
+            f" WHERE id IN (SELECT MAX(id) FROM runs {where} GROUP BY instance, method, cutoff, seed)",
+            params).fetchall()
+        for run_id, instance_name, method, cutoff, seed, solution, lower_bound, bound_source, extra in runs:
+            trace = conn.execute("SELECT time, quality FROM trace WHERE run_id = ? ORDER BY rowid",
+                                 (run_id,)).fetchall()
+            write_legacy(output_dir, instance_name, method, cutoff, seed, [int(i) for i in solution.split()],
+                         trace, lower_bound, bound_source, json.loads(extra) if extra else None)
+        return len(runs)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and export the result store")
+    parser.add_argument('command', choices=['best', 'ttq', 'export'])
+    parser.add_argument('-db', default=STORE_PATH, help='Path of the result store')
+    parser.add_argument('-alg', required=False, help='Only consider runs of this algorithm')
+    parser.add_argument('-inst', required=False, help='Instance name (required for ttq)')
+    parser.add_argument('-target', type=int, required=False, help='Target solution size (ttq)')
+    parser.add_argument('-output', default=os.path.join("..", "output"), help='Directory for export')
+    args = parser.parse_args()
+
+    if args.command == 'best':
+        for instance, size, method, cutoff, seed, run_id, lower_bound in best_per_instance(args.db, args.alg):
+            bound = "" if lower_bound is None else f" (lower bound {lower_bound})"
+            print(f"{instance}: {size} by {method} cutoff={cutoff} seed={seed} run={run_id}{bound}")
+    elif args.command == 'ttq':
+        if args.inst is None or args.target is None:
+            parser.error("ttq needs -inst and -target")
+        for run_id, method, cutoff, seed, reached in time_to_quality(args.inst, args.target, args.db, args.alg):
+            when = "never" if reached is None else f"{reached:.2f}s"
+            print(f"run {run_id} {method} cutoff={cutoff} seed={seed}: {when}")
+    else:
+        count = export_legacy(args.output, args.db, args.inst)
+        print(f"Exported {count} runs to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ import time
 import os
 import math
 import glob
+from bounds import global_lower_bound
+from resultstore import STORE_PATH, configure, save_run
+from checkpoint import CHECKPOINT_INTERVAL, checkpoint_path, save_checkpoint, load_checkpoint, remove_checkpoint
+from coverage import BACKENDS, greedy_cover, make_backend
 
 
 #parsing the input file
@@ -22,8 +26,13 @@ def parse_instance(filepath):
     return U, S, raw_indices
 
 #approx algo to initialize guess
-def greedy_approx(U, S, raw_indices):
+#(with a coverage backend, the gains of all sets are scored against the uncovered mask in one call;
+#sets already in the cover gain nothing, so the first best set is the same as below)
+def greedy_approx(U, S, raw_indices, backend=None):
     cover_indices = []
+    if backend is not None:
+        cover_indices = greedy_cover(backend)
+        return cover_indices, [raw_indices[i] for i in cover_indices]
     uncovered = set(U)
     S_copy = list(zip(S, range(len(S)), raw_indices))
     while uncovered:
@@ -45,12 +54,21 @@ def get_coverage(solution_indices, S):
     return covered
 
 #checks if the solution currently is valid
-def is_valid_solution(solution_indices, S, U):
+def is_valid_solution(solution_indices, S, U, backend=None):
+    if backend is not None:
+        return backend.covers_all(solution_indices)
     return get_coverage(solution_indices, S) == U
 
 #implementing pruning to get rid of redundancies in the set
-def prune_solution(solution_indices, S, U):
+#(both versions repeatedly drop the first redundant set, the backend finds it without rebuilding the union per set)
+def prune_solution(solution_indices, S, U, backend=None):
     res = solution_indices.copy()
+    if backend is not None:
+        pos = backend.first_redundant(res)
+        while pos >= 0:
+            res.pop(pos)
+            pos = backend.first_redundant(res)
+        return res
     i = 0
     while i < len(res):
         candidate = res[:i] + res[i+1:]
@@ -61,130 +79,249 @@ def prune_solution(solution_indices, S, U):
             i += 1
     return res
 
+#temperature schedule settings
+INITIAL_ACCEPT = 0.5       #target probability of accepting a worse move at the start of a cycle
+FINAL_ACCEPT = 0.005       #target probability of accepting a worse move at the cutoff
+REHEAT_FRACTION = 0.5      #each reheat restarts the cycle at this fraction of the starting temperature
+SCHEDULE_POINTS = 100      #number of temperature samples recorded over a run
+EPOCH_FRACTION = 0.001     #length of an epoch (temperature adaptation, stagnation check) as a fraction of the cutoff
+EPOCH_MIN_ITERATIONS = 10  #an epoch lasts at least this many iterations, so its acceptance rate is not a single move
+
+#generates the remove, add and swap neighbors of the current solution
+def get_neighbors(current_solution, S, U, backend=None):
+    neighbors = []
+    for i in range(len(current_solution)):
+        candidate = current_solution[:i] + current_solution[i+1:]
+        if is_valid_solution(candidate, S, U, backend):
+            candidate = prune_solution(candidate, S, U, backend)
+            neighbors.append(candidate)
+    curr = set(range(len(S)))
+    not_in_solution = list(curr - set(current_solution))
+    #add (not pruned: this is the uphill move, one set larger, that lets the walk leave a local optimum;
+    #pruning would just drop the added set again)
+    if not_in_solution:
+        candidate = current_solution.copy()
+        candidate.append(random.choice(not_in_solution))
+        neighbors.append(candidate)
+    #swap
+    if current_solution and not_in_solution:
+        candidate = current_solution.copy()
+        iswap = random.randint(0, len(candidate) - 1)
+        candidate[iswap] = random.choice(not_in_solution)
+        candidate = prune_solution(candidate, S, U, backend)
+        if is_valid_solution(candidate, S, U, backend):
+            neighbors.append(candidate)
+    if len(current_solution) > 1:
+        candidate = current_solution.copy()
+        removal_index = random.choice(range(len(current_solution)))
+        candidate.pop(removal_index)
+        if is_valid_solution(candidate, S, U, backend):
+            candidate = prune_solution(candidate, S, U, backend)
+            neighbors.append(candidate)
+    return neighbors
+
+#starting and final temperatures: a worse move is accepted with probability INITIAL_ACCEPT at the start
+#and FINAL_ACCEPT at the cutoff. Removals and pruned swaps never make the cover larger, so the only worse
+#move of get_neighbors is the unpruned add, which always grows the cover by exactly one set (delta = 1)
+#and exp(-1 / t) = p gives t = -1 / ln(p) without sampling any moves.
+def schedule_temperatures():
+    t0 = -1 / math.log(INITIAL_ACCEPT)
+    tf = -1 / math.log(FINAL_ACCEPT)
+    return t0, tf
+
+#geometric cooling from t0 to tf over the fraction of the current cycle that has elapsed
+def cycle_temperature(t0, tf, fraction):
+    return t0 * (tf / t0) ** min(1.0, max(0.0, fraction))
+
 #Simulated annealing main code
 """ Simulated Annealing
 - Uses Approximation Algorithm as the initial solution
 
 - Implements Simulated Annealing with:
-    - A time cutoff (in seconds)
-    - A no-improvement cutoff along with time cutoff
-    - A probabilistic acceptance of worse moves based on a temperature schedule
-    - add, swap, and remove possibilities at each iteration
+    - A time cutoff (in seconds); the whole cutoff is used by the temperature schedule
+    - Early termination once the best solution meets the global lower bound (bounds.py)
+    - A probabilistic acceptance of worse moves based on a temperature schedule:
+        - the starting and final temperatures accept the one-set growth of a worse move with probability
+          INITIAL_ACCEPT and FINAL_ACCEPT (schedule_temperatures)
+        - the temperature cools geometrically with elapsed time, reaching its final value at the cutoff
+        - an epoch lasts EPOCH_FRACTION of the cutoff (and at least EPOCH_MIN_ITERATIONS iterations); after every epoch the temperature is scaled up or
+          down so the acceptance rate of worse moves tracks a target that falls from INITIAL_ACCEPT to FINAL_ACCEPT
+        - after threshold epochs without a new best solution, the search restarts from the best
+          solution and reheats (a new cycle from REHEAT_FRACTION of the starting temperature to the cutoff)
+    - add, swap, and remove possibilities at each iteration (the add move is the only one that can
+      make the cover larger)
     - run for max of 10 minutes per .in file
+    - periodic checkpoints (incumbent, RNG state, temperature, stagnation counter) so a killed
+      run can be continued with -resume using the remaining time budget
+    - the run (solution, trace, lower bound and the schedule of time, temperature, acceptance rate
+      and reheats) is recorded in the result store (resultstore.py)
+    - max_iterations optionally caps the number of iterations (used by benchmark.py to time the annealing loop)
+    - backend optionally does the coverage checks and pruning on a coverage backend (coverage.py, -backend bitset)
     - use "python3 simulatedannealing.py -inst ../data -alg LS2 -time 600 -seed 45" to run
 """
-def simulated_annealing(U, S, raw_indices, cutoff_time, seed=1, threshold=100, initial_solution=None):
-    random.seed(seed)
-    start_time = time.time()
-
-    if initial_solution is None:
-        solution_indices, n = greedy_approx(U, S, raw_indices)
+def simulated_annealing(U, S, raw_indices, cutoff_time, seed=1, threshold=100, initial_solution=None,
+                        checkpoint_file=None, resume_state=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+                        lower_bound=0, max_iterations=None, backend=None):
+    if resume_state is not None:
+        #continue a checkpointed run: restore the RNG and shift the clock by the time already spent
+        random.setstate(resume_state["rng_state"])
+        start_time = time.time() - resume_state["elapsed"]
+        trace = resume_state["trace"]
+        schedule = resume_state["schedule"]
+        temp = resume_state["temp"]
+        t0, tf = resume_state["t0"], resume_state["tf"]
+        cycle_t0 = resume_state["cycle_t0"]
+        correction = resume_state["correction"]
+        cycle_start = start_time + resume_state["cycle_start"]
+        reheats = resume_state["reheats"]
+        best_solution = resume_state["best_solution"]
+        current_solution = resume_state["current_solution"]
+        s = resume_state["stagnation"]
+        c = resume_state["iteration"]
+        epoch_end = start_time + resume_state["epoch_end"]
+        epoch_first = resume_state["epoch_first"]
+        proposed_worse, accepted_worse = resume_state["proposed_worse"], resume_state["accepted_worse"]
+        print(f"Resuming LS2 from checkpoint at {resume_state['elapsed']:.2f}s: Temp={temp:.3f}, "
+              f"Best Quality={len(best_solution)}, stagnation={s}, reheats={reheats}")
     else:
-        solution_indices = initial_solution.copy()
-    solution_indices = prune_solution(solution_indices, S, U)
-    trace = [(0.0, len(solution_indices))]
-    temp = 200
-    final_temp = 2
-    alpha = 0.995
-    base_iterations = max(10, len(S) // 5)
-    best_solution = solution_indices.copy()
+        random.seed(seed)
+        start_time = time.time()
+
+        if initial_solution is None:
+            solution_indices, n = greedy_approx(U, S, raw_indices, backend)
+        else:
+            solution_indices = initial_solution.copy()
+        solution_indices = prune_solution(solution_indices, S, U, backend)
+        trace = [(0.0, len(solution_indices))]
+        best_solution = solution_indices.copy()
+        current_solution = solution_indices.copy()
+        t0, tf = schedule_temperatures()
+        temp = t0
+        cycle_t0 = t0        #starting temperature of the current cycle
+        correction = 1.0     #adaptive scaling of the scheduled temperature
+        cycle_start = start_time
+        reheats = 0
+        #schedule samples are (time, temperature, acceptance rate of worse moves in the last epoch or None
+        #when no worse move was proposed, reheats)
+        schedule = [(time.time() - start_time, temp, None, reheats)]
+        s = 0
+        c = 0
+        epoch_end = None
+        proposed_worse, accepted_worse = 0, 0
+    epoch_length = cutoff_time * EPOCH_FRACTION
     best_quality = len(best_solution)
-    current_solution = solution_indices.copy()
     current_quality = len(current_solution)
-    s = 0
-    c = 0
-    while temp > final_temp and (time.time() - start_time < cutoff_time) and (s < threshold):
-        improved = False
-        if s > 50:
-            iters = base_iterations * 2 #try and do more work if approaching 100 same results
-        else:
-            iters = base_iterations
-        for i in range(iters):
-            if time.time() - start_time >= cutoff_time:
+    improved = resume_state["improved"] if resume_state is not None else False
+    last_checkpoint = time.time()
+    last_schedule = schedule[-1][0]
+
+    #everything needed to continue the run from the current point
+    def snapshot():
+        return {"elapsed": time.time() - start_time, "rng_state": random.getstate(), "trace": trace,
+                "schedule": schedule, "temp": temp, "t0": t0, "tf": tf, "cycle_t0": cycle_t0, "correction": correction,
+                "cycle_start": cycle_start - start_time, "reheats": reheats, "stagnation": s,
+                "iteration": c, "epoch_end": epoch_end - start_time, "epoch_first": epoch_first, "improved": improved,
+                "proposed_worse": proposed_worse, "accepted_worse": accepted_worse,
+                "best_solution": best_solution, "current_solution": current_solution}
+
+    #stop at the cutoff, or as soon as the best solution meets the global lower bound (it is then provably optimal)
+    while (time.time() - start_time < cutoff_time) and best_quality > lower_bound:
+        if epoch_end is None:
+            epoch_end = time.time() + epoch_length
+            epoch_first = c
+        while True:
+            now = time.time()
+            if (now >= epoch_end and c - epoch_first >= EPOCH_MIN_ITERATIONS) or now - start_time >= cutoff_time:
+                break
+            if best_quality <= lower_bound or c == max_iterations:
                 break
+            if checkpoint_file is not None and now - last_checkpoint >= checkpoint_interval:
+                save_checkpoint(checkpoint_file, snapshot())
+                last_checkpoint = time.time()
             c += 1
+            fraction = (now - cycle_start) / max(1e-9, start_time + cutoff_time - cycle_start)
+            temp = correction * cycle_temperature(cycle_t0, tf, fraction)
             if c % 100 == 0:
-                print(f"Iteration {c}: Temp={temp:.2f}, Current Quality={current_quality}, "
-                      f"Best Quality={best_quality}, stagnation={s}")
-            neighbors = []
-            for i in range(len(current_solution)):
-                candidate = current_solution[:i] + current_solution[i+1:]
-                if is_valid_solution(candidate, S, U):
-                    candidate = prune_solution(candidate, S, U)
-                    neighbors.append(candidate)
-            curr = set(range(len(S)))
-            not_in_solution = list(curr - set(current_solution))
-            #add 
-            if not_in_solution:
-                candidate = current_solution.copy()
-                candidate.append(random.choice(not_in_solution))
-                candidate = prune_solution(candidate, S, U)
-                if is_valid_solution(candidate, S, U):
-                    neighbors.append(candidate)
-            #swap
-            if current_solution and not_in_solution:
-                candidate = current_solution.copy()
-                iswap = random.randint(0, len(candidate) - 1)
-                candidate[iswap] = random.choice(not_in_solution)
-                candidate = prune_solution(candidate, S, U)
-                if is_valid_solution(candidate, S, U):
-                    neighbors.append(candidate)
-            if len(current_solution) > 1:
-                candidate = current_solution.copy()
-                removal_index = random.choice(range(len(current_solution)))
-                candidate.pop(removal_index)
-                if is_valid_solution(candidate, S, U):
-                    candidate = prune_solution(candidate, S, U)
-                    neighbors.append(candidate)
+                print(f"Iteration {c}: Temp={temp:.3f}, Current Quality={current_quality}, "
+                      f"Best Quality={best_quality}, stagnation={s}, reheats={reheats}")
+            neighbors = get_neighbors(current_solution, S, U, backend)
             if not neighbors:
                 continue
-            for q in range(1):
-                new_solution = random.choice(neighbors)
-                new_quality = len(new_solution)
-                delta = new_quality - current_quality
-                if delta < 0 or random.random() < math.exp(-delta / temp):
-                    current_solution = new_solution.copy()
-                    current_quality = new_quality
-                    if current_quality < best_quality:
-                        best_solution = current_solution.copy()
-                        best_quality = current_quality
-                        trace.append((time.time() - start_time, best_quality))
-                        improved = True
+            new_solution = random.choice(neighbors)
+            new_quality = len(new_solution)
+            delta = new_quality - current_quality
+            if delta > 0:
+                proposed_worse += 1
+            if delta < 0 or random.random() < math.exp(-delta / temp):
+                if delta > 0:
+                    accepted_worse += 1
+                current_solution = new_solution.copy()
+                current_quality = new_quality
+                if current_quality < best_quality:
+                    best_solution = current_solution.copy()
+                    best_quality = current_quality
+                    trace.append((time.time() - start_time, best_quality))
+                    improved = True
+        elapsed = time.time() - start_time
+        if elapsed >= cutoff_time or c == max_iterations:
+            break
+
+        #adapt: compare the acceptance rate of worse moves in this epoch with the scheduled target
+        fraction = (time.time() - cycle_start) / max(1e-9, start_time + cutoff_time - cycle_start)
+        target = INITIAL_ACCEPT * (FINAL_ACCEPT / INITIAL_ACCEPT) ** min(1.0, fraction)
+        rate = accepted_worse / proposed_worse if proposed_worse else None
+        if proposed_worse:
+            correction = min(10.0, max(0.1, correction * (0.9 if rate > target else 1.1)))
+        proposed_worse, accepted_worse = 0, 0
+
         if not improved:
             s += 1
         else:
             s = 0
-        temp *= alpha
+        if s >= threshold:
+            #reheat: no progress for threshold epochs, restart a cooler cycle from the best solution
+            reheats += 1
+            cycle_t0 = max(tf, t0 * REHEAT_FRACTION)
+            correction = 1.0
+            cycle_start = time.time()
+            current_solution = best_solution.copy()
+            current_quality = best_quality
+            s = 0
+            schedule.append((elapsed, cycle_t0, rate, reheats))
+            last_schedule = elapsed
+        elif elapsed - last_schedule >= cutoff_time / SCHEDULE_POINTS:
+            schedule.append((elapsed, temp, rate, reheats))
+            last_schedule = elapsed
+        epoch_end = None
+        improved = False
+    if checkpoint_file is not None:
+        #the run finished normally, the checkpoint is no longer needed
+        remove_checkpoint(checkpoint_file)
     original_indices = [raw_indices[i] for i in best_solution]
     elapsed = time.time() - start_time
-    return best_solution, original_indices, trace, elapsed
-
-#writing .sol and .trace files
-def write_output(instance_path, method, cutoff, original_indices, seed=None, trace=None):
-    instance_name = os.path.splitext(os.path.basename(instance_path))[0]
-    output_dir = "../output"
-    os.makedirs(output_dir, exist_ok=True)
-    if method in ["LS2"]:
-        base_name = f"{instance_name}_{method}_{cutoff}_{seed}"
-    solution_path = os.path.join(output_dir, f"{base_name}.sol")
-    with open(solution_path, 'w') as f:
-        f.write(f"{len(original_indices)}\n")
-        f.write(" ".join(map(str, original_indices)) + "\n")
-    if trace and method in ["LS2"]:
-        trace_path = os.path.join(output_dir, f"{base_name}.trace")
-        with open(trace_path, 'w') as f:
-            for timestamp, quality in trace:
-                f.write(f"{timestamp:.2f} {quality}\n")
+    return best_solution, original_indices, trace, elapsed, schedule
 
 #main code to run the simulated annealing helper function
-def process_file(file_path, algorithm, cutoff_time, seed):
+def process_file(file_path, algorithm, cutoff_time, seed, resume=False, checkpoint_interval=CHECKPOINT_INTERVAL,
+                 backend="set"):
     U, S, raw_indices = parse_instance(file_path)
+    cover = make_backend(backend, U, S)
     if algorithm == "LS2":
-        initial_solution, x = greedy_approx(U, S, raw_indices)
-        initial_solution = prune_solution(initial_solution, S, U)
-        best_solution, original_indices, trace, nxt = simulated_annealing(
-            U, S, raw_indices, cutoff_time, seed=seed, initial_solution=initial_solution)
-        write_output(file_path, algorithm, cutoff_time, original_indices, seed, trace)
+        ckpt_path = checkpoint_path(file_path, algorithm, cutoff_time, seed)
+        resume_state = load_checkpoint(ckpt_path) if resume else None
+        if resume_state is None:
+            initial_solution, x = greedy_approx(U, S, raw_indices, cover)
+            initial_solution = prune_solution(initial_solution, S, U, cover)
+        else:
+            initial_solution = None
+        incumbent = initial_solution if resume_state is None else resume_state["best_solution"]
+        bound, source = global_lower_bound(U, S, len(incumbent), file_path)
+        best_solution, original_indices, trace, nxt, schedule = simulated_annealing(
+            U, S, raw_indices, cutoff_time, seed=seed, initial_solution=initial_solution,
+            checkpoint_file=ckpt_path, resume_state=resume_state, checkpoint_interval=checkpoint_interval,
+            lower_bound=bound, backend=cover)
+        save_run(file_path, algorithm, cutoff_time, seed, original_indices, trace, nxt, bound, source,
+                 {"schedule": schedule})
 
 #main function to establish terminal arguments and combining .in files
 def main():
@@ -193,14 +330,20 @@ def main():
     parser.add_argument('-alg', choices=['LS2'], required=True)
     parser.add_argument('-time', type=int, required=True)
     parser.add_argument('-seed', type=int, default=42)
+    parser.add_argument('-resume', action='store_true')
+    parser.add_argument('-ckpt_interval', type=int, default=CHECKPOINT_INTERVAL)
+    parser.add_argument('-backend', choices=BACKENDS, default='set')
+    parser.add_argument('-store', default=STORE_PATH)
+    parser.add_argument('-legacy', action='store_true')
     args = parser.parse_args()
+    configure(store=args.store, legacy=args.legacy)
     if os.path.isfile(args.inst):
-        process_file(args.inst, args.alg, args.time, args.seed)
+        process_file(args.inst, args.alg, args.time, args.seed, args.resume, args.ckpt_interval, args.backend)
     elif os.path.isdir(args.inst) or args.inst == 'data':
         data_dir = args.inst if args.inst.endswith(os.sep) else args.inst + os.sep
         in_files = sorted(glob.glob(f"{data_dir}*.in"))
         for file_path in in_files:
-            process_file(file_path, args.alg, args.time, args.seed)
+            process_file(file_path, args.alg, args.time, args.seed, args.resume, args.ckpt_interval, args.backend)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,274 @@
+'''
+Bulk Solution Validator (all algorithms)
+
+This file checks every .sol file in the output directory against the instance it was produced for,
+and scores it against the optimum stored in the matching data/*.out file. With -store it checks the latest
+run of every (instance, method, cutoff, seed) in the result store (resultstore.py) instead.
+
+Each instance is parsed once into a flat (CSR) NumPy representation:
+    indptr[i]:indptr[i+1] is the slice of 'elements' holding the elements of subset i+1
+so the coverage of a solution is computed with a single gather + scatter instead of Python set unions.
+Instances are spread over worker processes, and each worker validates all the solutions of its instance.
+
+A solution is reported as
+    - malformed:     the file cannot be parsed, or its size line does not match the number of indices
+    - out_of_range:  an index is not in 1..m (solutions are 1-indexed)
+    - duplicate:     the same index appears more than once
+    - infeasible:    the selected subsets do not cover all n elements
+    - ok:            none of the above
+
+Usage:
+  python validate.py -output ../output -data ../data -workers 4 -csv report.csv
+  python validate.py -store ../output/results.db -data ../data
+
+Exit code is 1 if any solution is not ok, so it can be run after every batch.
+'''
+
+import argparse
+import csv
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from resultstore import latest_solutions
+
+SOL_PATTERN = re.compile(r'^(?P<instance>.+)_(?P<method>BnB|Approx|LS1|LS2)_(?P<cutoff>\d+)(?:_(?P<seed>-?\d+))?\.sol$')
+REPORT_FIELDS = ['file', 'instance', 'method', 'cutoff', 'seed', 'status', 'size', 'optimum', 'rel_err', 'detail']
+
+
+def load_instance(filepath):
+    '''
+    input: filepath: path to the .in file
+    output: n: number of elements
+            indptr: int64 array of length m+1, offsets of each subset in 'elements'
+            elements: int64 array with the elements of all subsets, subset after subset
+    '''
+    with open(filepath, 'r') as f:
+        n, m = map(int, f.readline().split())
+        sizes = np.zeros(m, dtype=np.int64)
+        chunks = []
+        for i in range(m):
+            parts = np.array(f.readline().split(), dtype=np.int64)
+            sizes[i] = len(parts) - 1     # the first number is the size of the subset
+            chunks.append(parts[1:])
+    indptr = np.zeros(m + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+    elements = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+    return n, indptr, elements
+
+
+def load_optimum(data_dir, instance_name):
+    '''
+    input: data_dir: directory holding the .in/.out files
+           instance_name: instance name without extension (e.g. small1)
+    output: size of the optimal solution, or None when there is no .out file
+    '''
+    out_path = os.path.join(data_dir, f"{instance_name}.out")
+    if not os.path.isfile(out_path):
+        return None
+    with open(out_path, 'r') as f:
+        return int(f.readline().split()[0])
+
+
+def read_solution(sol_path):
+    '''
+    input: sol_path: path to the .sol file
+    output: (size, indices) as returned by parse_solution
+    '''
+    with open(sol_path, 'r') as f:
+        return parse_solution(f.read())
+
+
+def parse_solution(text):
+    '''
+    input: text: solution in the .sol format (size line, then the indices)
+    output: (size, indices) where size is the number on the first line and indices the
+            int64 array on the second line, or None if the text cannot be parsed
+    '''
+    lines = text.split('\n')
+    try:
+        size = int(lines[0].strip())
+        indices = np.array(lines[1].split() if len(lines) > 1 else [], dtype=np.int64)
+    except ValueError:
+        return None
+    return size, indices
+
+
+def check_solution(n, indptr, elements, size, indices):
+    '''
+    input: n, indptr, elements: instance as returned by load_instance
+           size: solution size declared on the first line of the .sol file
+           indices: int64 array of 1-indexed subset indices
+    output: (status, detail)
+    '''
+    m = len(indptr) - 1
+    if size != len(indices):
+        return 'malformed', f"size line says {size} but {len(indices)} indices are listed"
+
+    bad = indices[(indices < 1) | (indices > m)]
+    if len(bad):
+        return 'out_of_range', f"indices outside 1..{m}: {' '.join(map(str, bad[:10]))}"
+
+    unique, counts = np.unique(indices, return_counts=True)
+    if np.any(counts > 1):
+        return 'duplicate', f"repeated indices: {' '.join(map(str, unique[counts > 1][:10]))}"
+
+    # Gather the elements of all selected subsets in one shot:
+    # for subset j the positions indptr[j] .. indptr[j+1]-1 of 'elements' are needed.
+    starts = indptr[indices - 1]
+    lengths = indptr[indices] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    selected = elements[offsets + np.arange(offsets.size)]
+
+    covered = np.zeros(n + 1, dtype=bool)
+    covered[selected] = True
+    missing = np.flatnonzero(~covered[1:]) + 1
+    if len(missing):
+        return 'infeasible', f"{len(missing)} uncovered elements, e.g. {' '.join(map(str, missing[:10]))}"
+    return 'ok', ''
+
+
+def report_row(name, instance, method='', cutoff='', seed=None, optimum=None):
+    '''
+    input: name: .sol file name, or the run id for solutions from the result store
+           instance, method, cutoff, seed: run the solution belongs to
+           optimum: size of the optimal solution, or None
+    output: report row with the status fields left empty
+    '''
+    return {'file': name, 'instance': instance, 'method': method, 'cutoff': cutoff,
+            'seed': '' if seed is None else seed, 'status': '', 'size': '',
+            'optimum': '' if optimum is None else optimum, 'rel_err': '', 'detail': ''}
+
+
+def validate_instance(job):
+    '''
+    input: job: (instance_path, optimum, list of (row, source)) where source is the path of a .sol file,
+                or the solution text itself for runs read from the result store
+    output: list of report rows (dicts with REPORT_FIELDS keys), one per solution
+    '''
+    instance_path, optimum, solutions = job
+    n, indptr, elements = load_instance(instance_path)
+    rows = []
+    for row, source in solutions:
+        parsed = read_solution(source) if row['file'].endswith('.sol') else parse_solution(source)
+        if parsed is None:
+            row['status'], row['detail'] = 'malformed', 'cannot parse solution'
+        else:
+            size, indices = parsed
+            row['size'] = len(indices)
+            row['status'], row['detail'] = check_solution(n, indptr, elements, size, indices)
+            if optimum:
+                row['rel_err'] = round((len(indices) - optimum) / optimum, 4)
+        rows.append(row)
+    return rows
+
+
+def collect_solutions(output_dir, store=None):
+    '''
+    input: output_dir: directory holding the .sol files
+           store: path of the result store to read the solutions from instead, or None
+    output: list of (row, source) for every solution, see validate_instance
+    '''
+    solutions = []
+    if store is not None:
+        for run_id, instance, method, cutoff, seed, size, solution in latest_solutions(store):
+            solutions.append((report_row(f"run {run_id}", instance, method, cutoff, seed), f"{size}\n{solution}"))
+        return solutions
+    for sol_path in sorted(glob.glob(os.path.join(output_dir, "*.sol"))):
+        name = os.path.basename(sol_path)
+        match = SOL_PATTERN.match(name)
+        if match is None:
+            solutions.append((report_row(name, ''), sol_path))
+            continue
+        solutions.append((report_row(name, match.group('instance'), match.group('method'), match.group('cutoff'),
+                                     match.group('seed')), sol_path))
+    return solutions
+
+
+def collect_jobs(solutions, data_dir):
+    '''
+    input: solutions: list of (row, source) returned by collect_solutions
+           data_dir: directory holding the .in/.out files
+    output: jobs: list of (instance_path, optimum, solutions) for the instances that exist
+            orphans: list of report rows for solutions without a matching instance
+    '''
+    by_instance = {}
+    orphans = []
+    for row, source in solutions:
+        instance_path = os.path.join(data_dir, f"{row['instance']}.in") if row['instance'] else None
+        if instance_path is None or not os.path.isfile(instance_path):
+            row['status'], row['detail'] = 'no_instance', 'no matching .in file in the data directory'
+            orphans.append(row)
+            continue
+        by_instance.setdefault(instance_path, []).append((row, source))
+
+    jobs = []
+    for instance_path, instance_solutions in sorted(by_instance.items()):
+        instance_name = os.path.splitext(os.path.basename(instance_path))[0]
+        optimum = load_optimum(data_dir, instance_name)
+        for row, _ in instance_solutions:
+            row['optimum'] = '' if optimum is None else optimum
+        jobs.append((instance_path, optimum, instance_solutions))
+    return jobs, orphans
+
+
+def validate_all(output_dir, data_dir, workers=None, store=None):
+    '''
+    input: output_dir: directory holding the .sol files
+           data_dir: directory holding the .in/.out files
+           workers: number of worker processes (None = one per CPU)
+           store: path of the result store to validate instead of the .sol files, or None
+    output: list of report rows for every solution
+    '''
+    jobs, rows = collect_jobs(collect_solutions(output_dir, store), data_dir)
+    if workers == 1:
+        results = map(validate_instance, jobs)
+        for instance_rows in results:
+            rows.extend(instance_rows)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for instance_rows in pool.map(validate_instance, jobs):
+                rows.extend(instance_rows)
+    return sorted(rows, key=lambda r: r['file'])
+
+
+def print_report(rows):
+    '''
+    input: rows: report rows returned by validate_all
+    output: None (prints the problems followed by a per-status summary)
+    '''
+    for row in rows:
+        if row['status'] != 'ok':
+            print(f"{row['file']}: {row['status']} {row['detail']}")
+    summary = {}
+    for row in rows:
+        summary[row['status']] = summary.get(row['status'], 0) + 1
+    print(f"{len(rows)} solutions checked: " + ", ".join(f"{k}={v}" for k, v in sorted(summary.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and score all .sol files in the output directory")
+    parser.add_argument('-output', default='../output', help='Directory holding the .sol files')
+    parser.add_argument('-store', required=False, help='Validate the latest runs in this result store instead')
+    parser.add_argument('-data', default='../data', help='Directory holding the .in/.out files')
+    parser.add_argument('-workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('-csv', required=False, help='Write the full report to this CSV file')
+    args = parser.parse_args()
+
+    if args.store and not os.path.isfile(args.store):
+        parser.error(f"no result store at {args.store}")
+    rows = validate_all(args.output, args.data, args.workers, args.store)
+    print_report(rows)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    sys.exit(0 if all(row['status'] == 'ok' for row in rows) else 1)
+
+if __name__ == "__main__":
+    main()